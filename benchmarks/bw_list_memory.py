@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""\
+Peak memory of bw_list on a large synthetic vault.
+
+Compares the streaming bw_list of dmenu_launch with the former implementation
+that read the whole 'bw list items' output and json.loads it at once.
+Each variant runs in its own interpreter against a fake 'bw' executable,
+and reports its peak RSS (ru_maxrss) and run time.
+
+Usage
+---------------
+  $ python3 benchmarks/bw_list_memory.py [items]
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import tempfile
+import subprocess
+
+ScriptDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FakeBW = """#!/bin/sh
+exec cat "{}"
+"""
+
+Runner = """
+import sys, time, json, subprocess, resource
+sys.path.insert(0, {scriptdir!r})
+import dmenu_launch.launcher as dmenu
+dmenu.bw_get_session = lambda scheme: 'SESSION'
+
+def bw_list_loads(scheme):
+    sessionID = dmenu.bw_get_session(scheme)
+    result = subprocess.run(['bw', 'list', 'items', '--session', sessionID], stdout=subprocess.PIPE)
+    BWJSON = json.loads(result.stdout)
+    tempArr = []
+    for i in BWJSON:
+        if 'login' in i:
+            tmpJSON = {{'id': i['id'], 'name': i['name'], 'username': i['login']['username']}}
+            if 'attachments' in i:
+                tmpJSON['attachments'] = [a['fileName'] for a in i['attachments']]
+            tempArr.append(tmpJSON)
+    del result
+    del BWJSON
+    return tempArr
+
+start = time.monotonic()
+users = {function}(None)
+elapsed = time.monotonic() - start
+print(json.dumps({{'items': len(users), 'seconds': elapsed,
+                  'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+def random_text(length):
+    return ''.join(random.choice(string.ascii_letters + ' ') for _ in range(length))
+
+def write_vault(path, count):
+    """Write a 'bw list items' like JSON array of count login items with notes, fields and history.
+
+    Items are written one by one: ru_maxrss survives exec on Linux, so a large
+    vault held in this process would show up in the measured children.
+    """
+    with open(path, 'w') as f:
+        f.write('[')
+        for n in range(count):
+            if n:
+                f.write(',')
+            json.dump(vault_item(n), f)
+        f.write(']')
+
+def vault_item(n):
+    """Return the n-th synthetic vault item."""
+    return {
+        'object': 'item',
+        'id': '{:08x}-0000-0000-0000-{:012x}'.format(n, n),
+        'organizationId': None,
+        'folderId': None,
+        'type': 1,
+        'name': 'host-{}.example.com'.format(n),
+        'notes': random_text(2000),
+        'favorite': False,
+        'fields': [{'name': 'domain', 'value': 'CORP', 'type': 0},
+                   {'name': 'runbook', 'value': random_text(500), 'type': 0}],
+        'login': {'uris': [{'match': None, 'uri': 'https://host-{}.example.com'.format(n)}],
+                  'username': 'admin{}'.format(n),
+                  'password': random_text(24),
+                  'totp': None,
+                  'passwordRevisionDate': None},
+        'attachments': [{'id': 'a{}'.format(n), 'fileName': 'id_ed25519', 'size': '411'}] if n % 10 == 0 else [],
+        'passwordHistory': [{'lastUsedDate': '2021-01-01T00:00:00.000Z', 'password': random_text(24)} for _ in range(5)],
+        'revisionDate': '2021-01-01T00:00:00.000Z',
+    }
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = os.path.join(tmp, 'vault.json')
+        write_vault(vault, count)
+
+        bw = os.path.join(tmp, 'bw')
+        with open(bw, 'w') as f:
+            f.write(FakeBW.format(vault))
+        os.chmod(bw, 0o755)
+
+        env = dict(os.environ, PATH=tmp + os.pathsep + os.environ['PATH'])
+        print('vault: {} items, {:.1f} MB of bw output'.format(count, os.path.getsize(vault) / 1024 / 1024))
+        for name, function in [('json.loads (before)', 'bw_list_loads'), ('streaming (dmenu.bw_list)', 'dmenu.bw_list')]:
+            code = Runner.format(scriptdir=ScriptDir, function=function)
+            result = subprocess.run([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, check=True)
+            stats = json.loads(result.stdout)
+            print('{:<28} peak RSS {:>8.1f} MB  {:>6.2f} s  ({} logins)'.format(
+                name, stats['maxrss_kb'] / 1024, stats['seconds'], stats['items']))
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
+# ------------------------------------------------------------------------------
+# EOF
+# ------------------------------------------------------------------------------
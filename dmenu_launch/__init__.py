@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+"""\
+Simple dmenu launcher for passwords, notes, files, web searches, remote hosts and application shortcuts.
+
+Usage
+---------------
+  $ dmenu-launch [-h] [-p | -n | -s | -a | --remmina | -w | -r | -u] [-m]
+  $ python3 -m dmenu_launch [...]
+
+Library
+---------------
+  scan(target), resolve(target, choice), launch(target, choice), menu(target)
+  and Bitwarden() serve callers that stay in one process, see dmenu_launch.api.
+"""
+from .launcher import main, LauncherError, Cancelled
+from .api import Targets, scheme, scan, resolve, launch, menu, Bitwarden
+
+__all__ = [
+    'main', 'LauncherError', 'Cancelled',
+    'Targets', 'scheme', 'scan', 'resolve', 'launch', 'menu', 'Bitwarden',
+]
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from .launcher import main
+
+main()
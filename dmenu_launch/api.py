@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""\
+Programmatic interface for tools that stay in one process, e.g. a status bar.
+
+  >>> import dmenu_launch
+  >>> dmenu_launch.scan('websearch')
+  ['aur-ArchUserReposetory', 'aw-ArchWiki', 'dd-DuckDuckGo', ...]
+  >>> dmenu_launch.launch('websearch', 'yt distrotube')
+
+Failures raise LauncherError, a dismissed menu raises Cancelled.
+"""
+import os
+
+from . import launcher
+from .launcher import LauncherError, Targets
+
+def scheme(target):
+    """Return the menu scheme of a target, checking its utils and directory."""
+    launcher.config_load()
+    if target not in Targets:
+        raise LauncherError("Unknown target '{}'!".format(target))
+    dmenu = launcher.dmenu_scheme(target)
+    launcher.check_dir_exist(dmenu)
+    return dmenu
+
+def scan(target):
+    """Return the entries the menu of a target offers, as launch() takes them.
+
+    For 'pass' these are the Bitwarden ids the menu shows as 'name  [username]'
+    lines, Bitwarden().names() maps them to their names.
+    """
+    dmenu = scheme(target)
+    if target == 'all':
+        return launcher.unified_choices()
+    if target == 'search':
+        return launcher.search_recent()
+    if target == 'pass':
+        return [i['id'] for i in launcher.pass_index(dmenu)]
+    return launcher.dmenu_choices(dmenu)
+
+def resolve(target, choice):
+    """Return what the menu of a target returns for choice: the file of a listed entry, or the text where free text is allowed."""
+    dmenu = scheme(target)
+    if target not in ['all', 'search', 'pass'] and os.path.isfile(dmenu.prefix + "/" + choice + dmenu.suffix):
+        return dmenu.prefix + "/" + choice + dmenu.suffix
+    if dmenu.allownonmatch or choice in scan(target):
+        return choice
+    raise LauncherError("No {} entry '{}'!".format(target, choice))
+
+def launch(target, choice):
+    """Run the action of a target on choice, as if it was picked in its menu."""
+    launcher.take_action(scheme(target), resolve(target, choice))
+
+def menu(target, multi=False):
+    """Show the menu of a target and act on the choice."""
+    launcher.run_menu(scheme(target), multi)
+
+class Bitwarden:
+    """Bitwarden CLI client reusing one unlocked session for all calls."""
+
+    def __init__(self, sessionID=None):
+        launcher.config_load()
+        self.scheme = launcher.dmenu_scheme('pass', check=False)
+        self.sessionID = sessionID
+
+    def session(self):
+        """Return the session key, unlocking the vault (with a dmenu password prompt) if needed."""
+        if self.sessionID is None:
+            self.sessionID = launcher.bw_get_session(self.scheme)
+        return self.sessionID
+
+    def items(self):
+        """Yield the items of the vault."""
+        return launcher.bw_list_items(self.session())
+
+    def names(self):
+        """Return [{'id', 'name', 'username'}] of the logins, from the --pass name index."""
+        return launcher.pass_index(self.scheme, self.session())
+
+    def login(self, id):
+        """Return the login of an item."""
+        return launcher.bw_get_login(self.scheme, id, self.session())
+
+    def logins(self, ids):
+        """Return {id: login} of several items."""
+        return launcher.bw_get_logins(self.scheme, ids, self.session())
+
+    def attachment(self, id, filename):
+        """Save an attachment of an item to a temporary file and return its path."""
+        return launcher.bw_get_attachment(self.scheme, id, filename, self.session())
@@ -0,0 +1,3410 @@
+# -*- coding: utf-8 -*-
+
+"""\
+The launcher engine: menus, sources and the actions run on a choice.
+
+Helpers raise LauncherError (or Cancelled when a menu is dismissed) instead of
+exiting, main() turns them into the command line behaviour.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import json
+import urllib.parse
+import tempfile
+import glob
+import base64
+import shlex
+import socket
+import threading
+import concurrent.futures
+import configparser
+import ctypes
+import struct
+import signal
+import codecs
+import hashlib
+import gzip
+import math
+import re
+import bisect
+import mmap
+import sqlite3
+import marshal
+import shutil
+import queue
+
+from collections import namedtuple
+from datetime import datetime
+
+ConfigFile = '~/.config/dmenu-launch/config.toml'  ## TOML file overriding the settings below, themes and schemes, see config_compile()
+ConfigCache = os.path.expanduser('~/.cache/dmenu-launch/config.marshal')  ## Validated form of ConfigFile, rebuilt when the file changes
+MenuLauncher = 'dmenu'                      ## Dmenu only support. (I may expand for Rofi support later)
+Browser = 'qutebrowser --target window'     ## default browser to use. ex: ## qutebrowser [--target window] ## firefox [--new-window] ## brave ## tor-browser
+DefaultSearch = 'dd-DuckDuckGo'             ## web seach default search engien if none is selected
+DefaultTheme = 'Default'                    ## Theme of Dmenu, a key of Themes or a [themes.<name>] table of ConfigFile
+ConsoleLaunchCommand = 'konsole -e'         ## Console to launch SSH sessions in. ex: ## alacritty -e  ## kitty  ## konsole -e  ## cool-retro-term -e   
+ScriptDir = os.path.expanduser(os.environ.get('XDG_DATA_HOME', '~/.local/share') + '/dmenu-launch')  ## Folder with the websearch and remote folders, created with the engines shipped in dmenu_launch/websearch
+RDPSharedFolder = '~/Nextcloud/RDPshare/'   ## shared folder that are connected to RDP
+CacheDir = os.path.expanduser('~/.cache/dmenu-launch')  ## Folder for launcher state and caches
+SSHAgentKeyLifetime = 3600                  ## Seconds a Bitwarden SSH key stays loaded in ssh-agent (0 = never load keys into ssh-agent)
+SSHControlThreshold = 5                     ## ConnectionTimes before an SSH host gets a persistent ControlMaster connection (0 = disabled)
+SSHControlPersist = '30m'                   ## How long an idle ControlMaster connection is kept open
+SSHControlDir = CacheDir + '/ssh-control'   ## Folder for ControlMaster sockets
+RDPDefaultProfile = 'auto'                  ## RDP profile for hosts without "profile" in their JSON: a key of RDPProfiles or 'auto' (pick by measured RTT)
+RDPProfiles = {                             ## xfreerdp performance flags per profile
+    'lan': '/bpp:32 /network:lan /gfx:RFX +fonts +window-drag +menu-anims',
+    'wan': '/bpp:24 /network:broadband-low /gfx:AVC420 +compression -wallpaper -themes',
+    'low': '/bpp:16 /network:modem /gfx:RFX +compression /compression-level:2 -wallpaper -themes -fonts -menu-anims -window-drag',
+}
+RDPAutoProfile = [(15, 'lan'), (80, 'wan'), (float('inf'), 'low')]  ## 'auto' uses the first profile whose RTT limit (ms) is above the measured RTT, else the last one
+RDPUnreachableProfile = 'wan'               ## RDP profile 'auto' uses when it cannot measure the RTT: unreachable hosts and RDP files
+VNCDefaultProfile = 'auto'                  ## VNC profile for hosts without "profile" in their JSON: a key of VNCProfiles or 'auto' (pick by measured RTT)
+VNCProfiles = {                             ## ssvncviewer encodings, compression/quality level (0-9), color depth and scaling per profile
+    'lan': {'encodings': 'copyrect hextile zrle raw', 'compresslevel': 1, 'quality': 9, 'depth': '', 'scale': 'autofit'},
+    'wan': {'encodings': 'copyrect tight zrle hextile', 'compresslevel': 6, 'quality': 6, 'depth': '16bpp', 'scale': 'autofit'},
+    'low': {'encodings': 'copyrect tight zlib', 'compresslevel': 9, 'quality': 2, 'depth': 'bgr233', 'scale': 'autofit'},
+}
+VNCAutoProfile = [(15, 'lan'), (80, 'wan'), (float('inf'), 'low')]  ## 'auto' uses the first profile whose RTT limit (ms) is above the measured RTT, else the last one
+VNCUnreachableProfile = 'wan'               ## VNC profile 'auto' uses for unreachable hosts
+ProbeTTL = 120                              ## Seconds host reachability results are shown in the remote menu before they are probed again
+ProbeWorkers = 32                           ## Concurrent TCP connects while probing remote hosts
+RaceDelay = .25                             ## Seconds before the next endpoint of a host with a "host" list is tried while the previous one has not answered
+RaceTimeout = 2                             ## Seconds to wait for any endpoint of a host with a "host" list before launching with the first one
+CredentialPrefetch = 10                     ## Bitwarden logins of the most used remote hosts kept in memory by a background process while the vault is unlocked (0 = disabled)
+CredentialSocket = CacheDir + '/credentials.sock'  ## Socket of the credential prefetch process
+PassIndexTTL = 3600                         ## Seconds before the cached Bitwarden name list of --pass is refreshed in the background
+ClipboardClearTime = 45                     ## Seconds a password copied by --pass stays in the clipboard
+NotesDir = '~/Notes'                        ## Folder with the notes opened by --notes
+NotesSuffix = '.md'                         ## File extension of notes
+SearchDir = '~'                             ## Folder searched by --search
+SearchIndexTTL = 3600                       ## Seconds before the --search file name index is refreshed in the background
+SearchSkipHidden = True                     ## Leave hidden files and folders out of the --search index
+BrowserHistory = [                          ## Browser history databases and bookmark files (glob patterns) merged into the websearch menu
+    '~/.local/share/qutebrowser/history.sqlite',
+    '~/.config/qutebrowser/bookmarks/urls',
+    '~/.config/qutebrowser/quickmarks',
+    '~/.mozilla/firefox/*/places.sqlite',
+]
+HistoryMenuSize = 30                        ## Most frecent urls shown in the websearch menu (0 = disabled)
+HistoryHalfLife = 14                        ## Days after which a visit counts half in the url ranking, a new bookmark counts as HistoryBookmarkWeight visits
+HistoryBookmarkWeight = 10
+HistorySyncInterval = 60                    ## Seconds between background syncs of the browser history
+HostImportSources = ['~/.ssh/config', '~/.ssh/known_hosts']  ## Default sources of --import-hosts: ssh config and known_hosts files, .rdp files and folders with .rdp files
+LatencyTimeout = 60                         ## Seconds to wait for a launched remote session to be established before giving up on timing it
+UnifiedTargets = ['apps', 'remmina', 'remote', 'websearch']  ## Menus merged by --all, text that matches no entry is searched on the web
+Configurable = [name for name in list(globals()) if name[0].isupper() and name not in ['ConfigFile', 'ConfigCache']]  # Settings ConfigFile may set
+
+Scheme = namedtuple(
+                    'dmenu',
+                     [
+                      'target',             # pass / apps/ notes / search
+                      'prefix',             # location prefix (base dir)
+                      'suffix',             # file extension to look for
+                      'allownonmatch',      # Allow return non matich items in dmenu [True/False]
+                      'theme',              # Set dmenu Theme
+                      'p',                  # Promt
+                      'l',                  # Lines
+                     ])
+Theme = namedtuple(
+                    'dmenu_theme',
+                     [
+                      'font',               # dmenu font name and size
+                      'nb','nf','sb','sf',  # dmenu color:
+                                            #   n=normal / s=selected,
+                                            #   b=background, f=foreground
+                     ])
+Themes = {
+    'Default': Theme(
+                    font='Droid Sans Mono:Regular:size=10',
+                    nb='#222222', nf='#EEEEEE', sb='#005577', sf='#EEEEEE',
+                  ),
+    'Eyes are not that good': Theme(
+                    font='Droid Sans Mono:Regular:size=16',
+                    nb='#222222', nf='#EEEEEE', sb='#005577', sf='#EEEEEE',
+                  ),
+}
+
+Speculation = {}                            # Background work started while dmenu is open, see speculate()
+UtilPaths = {}                              # shutil.which results, see find_util()
+Schemes = {}                                # Built schemes per (target, check), see dmenu_scheme()
+SchemeOverrides = {}                        # [schemes.<target>] tables of ConfigFile
+Config = None                               # Key of the applied ConfigFile, see config_load()
+
+Targets = ['pass', 'notes', 'search', 'apps', 'remmina', 'websearch', 'remote', 'all']
+
+class LauncherError(Exception):
+    """An action could not be carried out, the message tells why."""
+
+class Cancelled(LauncherError):
+    """A menu was closed without a usable choice."""
+
+def main():
+    """Command line entry point."""
+    args   = get_args()
+    try:
+        config_load()
+        if args.import_bangs:
+            bangs_import(dmenu_scheme('websearch', check=False), args.import_bangs)
+        elif args.latency_report:
+            latency_report()
+        elif args.import_hosts is not None:
+            hosts_import(dmenu_scheme('remote', check=False), args.import_hosts or HostImportSources)
+        elif args.background:
+            run_background(dmenu_setup(args), args.background)
+        else:
+            run_menu(dmenu_setup(args), args.multi)
+    except Cancelled:
+        pass
+    except LauncherError as error:
+        print("ERROR: {} Exiting!".format(error))
+    sys.exit(0)
+
+def run_menu(scheme, multi=False):
+    """Show the menu of a scheme and act on the choice."""
+    Labeler = None
+    if (scheme.target == "remote"):
+        threading.Thread(target=ssh_prewarm_masters, args=(scheme,), daemon=True).start()
+        Labeler = remote_status_labels
+    if (scheme.target == "remmina"):
+        Labeler = remmina_labels
+    CostumChoice = None
+    if (scheme.target == "websearch"):
+        History = history_menu(scheme)
+        if History:
+            CostumChoice = dmenu_choices(scheme) + list(History)
+            Labeler = lambda scheme, choices: History
+
+    Speculator = None
+    try:
+        if multi and (scheme.target == "remote"):
+            choices = dmenu_call(scheme, Labeler=Labeler, Multi=True)
+            if len(choices) > 1:
+                remote_connect_many(scheme, choices)
+                return
+            choice = choices[0]
+        elif (scheme.target == "all"):
+            choice = dmenu_call(scheme, None, unified_choices())
+        elif (scheme.target == "search"):
+            search_index_refresh(scheme)
+            choice = dmenu_call(scheme, None, search_recent())
+        elif (scheme.target == "pass"):
+            choice = dmenu_call(scheme, None, [i['id'] for i in pass_index(scheme)], Labeler=pass_labels)
+        else:
+            Speculator = speculate(scheme)
+            choice = dmenu_call(scheme, None, CostumChoice, Labeler=Labeler)
+        take_action(scheme, choice)
+    finally:
+        # Also when the menu is dismissed or fails, its threads must not outlive the menu
+        if Speculator is not None:
+            Speculator.shutdown(wait=False, cancel_futures=True)
+        # Speculative results are only valid for this menu, library callers may act again later
+        Speculation.clear()
+
+def run_steps(steps, Timings=None, cleanup=None):
+    """Run a small dependency graph {name: (function, [dependencies])} on threads and return {name: result}.
+
+    Each step starts as soon as its dependencies are done and is called with
+    a dict of their results; dependencies have to come earlier in steps. The
+    ms every step took are stored in Timings when given. Once all steps have
+    ended, the exception of the first failed step is raised, after cleanup
+    was called with the results of the steps that succeeded.
+    """
+    futures = {}
+    def run(function, dependencies):
+        done = {name: futures[name].result()[0] for name in dependencies}
+        start = time.monotonic()
+        return (function(done), (time.monotonic() - start) * 1000)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(steps))) as executor:
+        for name, (function, dependencies) in steps.items():
+            futures[name] = executor.submit(run, function, dependencies)
+
+    results = {}
+    failure = None
+    for name, future in futures.items():
+        try:
+            results[name], ms = future.result()
+        except BaseException as error:
+            failure = failure or error
+            continue
+        if Timings is not None:
+            Timings[name] = ms
+    if failure is not None:
+        if cleanup is not None:
+            cleanup(results)
+        raise failure
+    return results
+
+def find_util(util):
+    """Memoized shutil.which."""
+    if util not in UtilPaths:
+        UtilPaths[util] = shutil.which(util)
+    return UtilPaths[util]
+
+def check_req_utils(utils):
+    for util in utils:
+        util = util.split(' ', 1)[0]
+        if find_util(util) is None:
+            raise LauncherError("Util '{}' is missing, install it before proceeding!".format(util))
+
+def check_dir_exist(scheme):
+    """Checks required directories are present, the ones below ScriptDir are created."""
+    if scheme.prefix == ScriptDir or scheme.prefix.startswith(ScriptDir + '/'):
+        data_dir_setup()
+    if os.path.exists(scheme.prefix) is False:
+        raise LauncherError("Required directory '{}' is missing!".format(scheme.prefix))
+
+def data_dir_setup():
+    """Create ScriptDir with an empty remote folder and a websearch folder holding the engines shipped in the package."""
+    if(not os.path.isdir(ScriptDir + '/remote')):
+        os.makedirs(ScriptDir + '/remote')
+    if(not os.path.isdir(ScriptDir + '/websearch')):
+        os.makedirs(ScriptDir + '/websearch')
+        import importlib.resources
+        for engine in importlib.resources.files('dmenu_launch').joinpath('websearch').iterdir():
+            with open(ScriptDir + '/websearch/' + engine.name, 'wb') as f:
+                f.write(engine.read_bytes())
+
+def get_args():
+    """Return arguments from stdin or print usage instructions."""
+    parser = argparse.ArgumentParser(description='Simple dmenu launcher for passwords, notes and application shortcuts.')
+    group = parser.add_mutually_exclusive_group()
+
+
+    group.add_argument('-p', '--pass', action='store_true',
+                        help='Copy a password from Bitwarden to the clipboard with xclip.')
+    group.add_argument('-n', '--notes', action='store_true',
+                        help='Opens a text/markdown note from a given directory with exo-open, text that is no note name is searched in the notes.')
+    group.add_argument('-s', '--search', action='store_true',
+                        help='Quick search and launch from a given directory with exo-open.')
+    group.add_argument('-a', '--apps', action='store_true',
+                        help='Quick launches a desktop application with exo-open.')
+    group.add_argument('--remmina', action='store_true',
+                        help='Quick Remmina launcher')
+    group.add_argument('-w', '--websearch', action='store_true',
+                        help='Quick Web Search launcher')
+    group.add_argument('-r', '--remote', action='store_true',
+                        help='YA remmina attampt replacement')
+    group.add_argument('-u', '--all', action='store_true',
+                        help='One menu for apps, Remmina profiles, remote hosts and web search engines')
+    parser.add_argument('-m', '--multi', action='store_true',
+                        help='Select several remote hosts with Ctrl+Return and connect to all of them')
+    parser.add_argument('--import-bangs', metavar='BANGJSON',
+                        help='Import a DuckDuckGo bang list, its engines are then reached with "!<bang> <search>"')
+    parser.add_argument('--import-hosts', nargs='*', metavar='SOURCE',
+                        help='Add the hosts of ssh config, known_hosts and .rdp files (default: ~/.ssh/config ~/.ssh/known_hosts) to the remote hosts')
+    parser.add_argument('--latency-report', action='store_true',
+                        help='List the remote hosts and connection stages that took longest')
+    parser.add_argument('--background', choices=['probe', 'prefetch', 'pass-index', 'clear-clipboard', 'search-index', 'history', 'latency', 'import-enrich'],
+                        help=argparse.SUPPRESS)
+
+    if not len(sys.argv) > 1:
+        parser.print_help()
+        sys.exit(0)
+
+    args = parser.parse_args()
+    # Menus and background tasks work on the scheme of a mode flag
+    if not (args.import_bangs or args.latency_report or args.import_hosts is not None) \
+       and not any(getattr(args, target) for target in Targets):
+        parser.error('one of -p, -n, -s, -a, --remmina, -w, -r or -u is required')
+    return args
+
+def get_dmenu_theme(choise='Default'):
+    """Return the Theme of a name, the Default theme for unknown names."""
+    return Themes.get(choise, Themes['Default'])
+
+def config_compile(path):
+    """Parse and validate a TOML config file into {'settings', 'themes', 'schemes'}.
+
+      [settings]                 # any setting at the top of launcher.py
+      Browser = "firefox --new-window"
+      [themes.Big]               # font, nb, nf, sb, sf; missing keys come from Default
+      font = "Droid Sans Mono:Regular:size=16"
+      [schemes.notes]            # prefix, suffix, allownonmatch, theme, p, l of a target
+      prefix = "~/Documents/Notes"
+      theme = "Big"
+    """
+    # Only parsed when the file changed, launches reading ConfigCache skip the import
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise LauncherError("Reading '{}' needs Python 3.11 or the tomli package!".format(path))
+    try:
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as error:
+        raise LauncherError("Could not read config '{}': {}!".format(path, error))
+
+    def invalid(message):
+        return LauncherError("Invalid config '{}': {}!".format(path, message))
+
+    unknown = set(config) - {'settings', 'themes', 'schemes'}
+    if unknown:
+        raise invalid("unknown table(s) " + ', '.join(sorted(unknown)))
+
+    settings = config.get('settings', {})
+    for name, value in settings.items():
+        if name not in Configurable:
+            raise invalid("unknown setting '{}'".format(name))
+        default = globals()[name]
+        if not config_shape(value, type(default)()):
+            kind = type(default).__name__
+            raise invalid("setting '{}' must be {} {}".format(name, 'an' if kind[0] in 'aeiou' else 'a', kind))
+        if not config_shape(value, default):
+            raise invalid("setting '{}' holds items of the wrong type, see its default".format(name))
+
+    # Profile names the settings refer to have to exist in the profiles they end up with
+    def setting(name):
+        return settings.get(name, globals()[name])
+    for kind in ['RDP', 'VNC']:
+        profiles = setting(kind + 'Profiles')
+        if kind == 'VNC':
+            for profile, values in profiles.items():
+                if set(values) != set(VNCProfiles['lan']):
+                    raise invalid("VNC profile '{}' must set {}".format(profile, ', '.join(VNCProfiles['lan'])))
+        names = [profile for limit, profile in setting(kind + 'AutoProfile')] + [setting(kind + 'UnreachableProfile')]
+        # Like the "profile" of hosts, the default is matched lower case
+        if setting(kind + 'DefaultProfile').lower() != 'auto':
+            names.append(setting(kind + 'DefaultProfile').lower())
+        for profile in names:
+            if profile not in profiles:
+                raise invalid("unknown {} profile '{}'".format(kind, profile))
+    for target in setting('UnifiedTargets'):
+        if target not in Targets or target == 'all':
+            raise invalid("UnifiedTargets has unknown menu '{}'".format(target))
+
+    themes = {}
+    for name, theme in config.get('themes', {}).items():
+        if not isinstance(theme, dict) or set(theme) - set(Theme._fields):
+            raise invalid("theme '{}' may only set {}".format(name, ', '.join(Theme._fields)))
+        if not all(isinstance(v, str) for v in theme.values()):
+            raise invalid("theme '{}' values must be strings".format(name))
+        themes[name] = dict(Themes['Default']._asdict(), **theme)
+
+    schemes = config.get('schemes', {})
+    fields = {'prefix': str, 'suffix': str, 'allownonmatch': bool, 'theme': str, 'p': str, 'l': str}
+    for target, scheme in schemes.items():
+        if target not in Targets:
+            raise invalid("unknown scheme '{}'".format(target))
+        if not isinstance(scheme, dict):
+            raise invalid("scheme '{}' must be a table".format(target))
+        for field, value in scheme.items():
+            if field == 'l' and isinstance(value, int) and not isinstance(value, bool):
+                scheme[field] = value = str(value)
+            if field not in fields or not isinstance(value, fields[field]):
+                raise invalid("scheme '{}' field '{}' must be one of {}".format(target, field, ', '.join(fields)))
+        if 'theme' in scheme and scheme['theme'] not in themes and scheme['theme'] not in Themes:
+            raise invalid("scheme '{}' uses unknown theme '{}'".format(target, scheme['theme']))
+    theme = settings.get('DefaultTheme')
+    if theme is not None and theme not in themes and theme not in Themes:
+        raise invalid("unknown DefaultTheme '{}'".format(theme))
+
+    return {'settings': settings, 'themes': themes, 'schemes': schemes}
+
+def config_shape(value, default):
+    """Return True if a config value has the types of a setting's default value, item by item.
+
+    Tuples are records with a fixed length, lists and dicts may hold any number
+    of items shaped like the default's (dicts: the item under the same key, else
+    its first one).
+    """
+    numbers = (int, float)
+    if type(default) is bool or type(value) is bool:
+        return type(default) is type(value)
+    if isinstance(default, numbers):
+        return isinstance(value, numbers)
+    if isinstance(default, tuple):
+        return isinstance(value, (list, tuple)) and len(value) == len(default) \
+            and all(config_shape(v, d) for v, d in zip(value, default))
+    if isinstance(default, list):
+        return isinstance(value, list) and (not default or all(config_shape(v, default[0]) for v in value))
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            return False
+        if not default:
+            return True
+        first = next(iter(default.values()))
+        return all(config_shape(v, default.get(k, first)) for k, v in value.items())
+    return isinstance(value, type(default))
+
+def config_load():
+    """Apply ConfigFile once per process, from ConfigCache while the file keeps its mtime and size."""
+    global Config
+    if Config is not None:
+        return
+    path = os.path.expanduser(ConfigFile)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        Config = []
+        return
+
+    key = [path, stat.st_mtime_ns, stat.st_size]
+    compiled = None
+    try:
+        with open(ConfigCache, 'rb') as f:
+            cached = marshal.load(f)
+        if cached['key'] == key:
+            compiled = cached['config']
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+
+    if compiled is None:
+        compiled = config_compile(path)
+        if(not os.path.isdir(os.path.dirname(ConfigCache))):
+            os.makedirs(os.path.dirname(ConfigCache))
+        with open(ConfigCache + '.tmp', 'wb') as f:
+            marshal.dump({'key': key, 'config': compiled}, f)
+        os.replace(ConfigCache + '.tmp', ConfigCache)
+
+    settings = compiled['settings']
+    globals().update(settings)
+    # Paths below CacheDir follow it unless they are set themselves
+    global ScriptDir, CacheDir, SSHControlDir, CredentialSocket
+    ScriptDir = os.path.expanduser(ScriptDir)
+    CacheDir = os.path.expanduser(CacheDir)
+    SSHControlDir = os.path.expanduser(settings.get('SSHControlDir', CacheDir + '/ssh-control'))
+    CredentialSocket = os.path.expanduser(settings.get('CredentialSocket', CacheDir + '/credentials.sock'))
+    for name, theme in compiled['themes'].items():
+        Themes[name] = Theme(**theme)
+    SchemeOverrides.update(compiled['schemes'])
+    Schemes.clear()
+    Config = key
+
+def dmenu_setup(args):
+    """Setup dmenu font, color and size based on user's input."""
+    dmenu = ""
+    for target in Targets:
+        if getattr(args, target):
+            # Background tasks neither show a menu nor launch clients
+            dmenu = dmenu_scheme(target, check=not args.background)
+
+    check_dir_exist(dmenu)
+    return dmenu
+
+def dmenu_scheme(target, check=True):
+    """Return the dmenu scheme of a target, checking its required utils unless check is False.
+
+    Schemes are built once per process, with the [schemes.<target>] overrides of ConfigFile.
+    """
+    if (target, check) in Schemes:
+        return Schemes[(target, check)]
+    scheme = Scheme
+
+    dmenu = ""
+    if (target == 'pass'):
+        if check:
+            check_req_utils([MenuLauncher, 'bw', 'xclip'])
+        dmenu = scheme(
+                    target='pass',
+                    prefix=ScriptDir,
+                    suffix="",
+                    allownonmatch=False,
+                    theme=DefaultTheme,
+                    p='Password',
+                    l='0',
+                  )
+    if (target == 'notes'):
+        if check:
+            check_req_utils([MenuLauncher, 'exo-open'])
+        dmenu = scheme(
+                    target='notes',
+                    prefix=os.path.expanduser(NotesDir),
+                    suffix=NotesSuffix,
+                    allownonmatch=True,
+                    theme=DefaultTheme,
+                    p='Notes',
+                    l='0',
+                  )
+    if (target == 'search'):
+        if check:
+            check_req_utils([MenuLauncher, 'exo-open'])
+        dmenu = scheme(
+                    target='search',
+                    prefix=os.path.expanduser(SearchDir).rstrip('/'),
+                    suffix="",
+                    allownonmatch=True,
+                    theme=DefaultTheme,
+                    p='Search',
+                    l='0',
+                  )
+    if (target == 'apps'):
+        if check:
+            check_req_utils([MenuLauncher, 'exo-open'])
+        dmenu = scheme(
+                    target='apps',
+                    prefix="/usr/share/applications",
+                    suffix=".desktop",
+                    allownonmatch=False,
+                    theme=DefaultTheme,
+                    p='APPS',
+                    l='0',
+                  )
+    if (target == 'remmina'):
+        if check:
+            check_req_utils([MenuLauncher, 'remmina'])
+        dmenu = scheme(
+                    target='remmina',
+                    prefix=os.path.expanduser('~/.local/share/remmina'),
+                    suffix=".remmina",
+                    allownonmatch=False,
+                    theme=DefaultTheme,
+                    p='Remmina',
+                    l='0',
+                  )
+    if (target == 'websearch'):
+        if check:
+            check_req_utils([MenuLauncher, Browser])
+        dmenu = scheme(
+                    target='websearch',
+                    prefix=ScriptDir + '/websearch',
+                    suffix=".txt",
+                    allownonmatch=True,
+                    theme=DefaultTheme,
+                    p='Web Search',
+                    l='0',
+                  )
+    if (target == 'remote'):
+        if check:
+            check_req_utils([MenuLauncher, Browser, 'bw', 'ssh', 'sshpass', 'ssvncviewer', 'xfreerdp'])
+        dmenu = scheme(
+                    target='remote',
+                    prefix=ScriptDir + '/remote',
+                    suffix=".json",
+                    allownonmatch=True,
+                    theme=DefaultTheme,
+                    p='Remote',
+                    l='0',
+                  )
+    if (target == 'all'):
+        if check:
+            check_req_utils([MenuLauncher])
+        dmenu = scheme(
+                    target='all',
+                    prefix=ScriptDir,
+                    suffix="",
+                    allownonmatch=True,
+                    theme=DefaultTheme,
+                    p='Launch',
+                    l='0',
+                  )
+    if dmenu and target in SchemeOverrides:
+        dmenu = dmenu._replace(**SchemeOverrides[target])
+        dmenu = dmenu._replace(prefix=os.path.expanduser(dmenu.prefix).rstrip('/') or '/')
+    Schemes[(target, check)] = dmenu
+    return dmenu
+
+def dmenu_choices(scheme, visited=None):
+    """Return the files below scheme.prefix with scheme.suffix, as sorted relative paths without suffix.
+
+    The walked directories are added to the visited dict as {dir: mtime} when given.
+    """
+    choices = []
+    for basedir, dirs , files in os.walk(scheme.prefix, followlinks=True):
+        dirs.sort()
+        files.sort()
+        if visited is not None:
+            visited[basedir] = os.stat(basedir).st_mtime
+
+        dirsubpath = basedir[len(scheme.prefix):].lstrip('/')
+        for f in files:
+            if f.endswith(scheme.suffix):
+                full_path = os.path.join(dirsubpath, f.replace(scheme.suffix, '', -1))
+                choices += [full_path]
+    return choices
+
+def dmenu_call(scheme, Prompt=None, CostumChoice=None, NoChoice=False, Password=False, Labeler=None, Multi=False):
+    choices = []
+    if (NoChoice == False and CostumChoice == None):
+        choices = dmenu_choices(scheme)
+
+    if (CostumChoice != None):
+        choices = CostumChoice
+
+    theme = get_dmenu_theme(scheme.theme)
+
+    args = ["-fn", theme.font, \
+            "-nb", theme.nb,   \
+            "-nf", theme.nf,   \
+            "-sb", theme.sb,   \
+            "-sf", theme.sf,   \
+            "-l", scheme.l     ]
+
+    if (Prompt == None):
+        args.insert(0, "-p")
+        args.insert(1, scheme.p)
+    else:
+        args.insert(0, "-p")
+        args.insert(1, Prompt)
+
+    if Password:
+        args.insert(0, "-P")
+        
+    if MenuLauncher == "rofi":
+        args.insert(0, "-dmenu")
+
+    dmenu = subprocess.Popen([MenuLauncher] + args,
+                             stdin=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             stdout=subprocess.PIPE)
+
+    # Labeler(scheme, choices) returns {choice: line shown in dmenu instead of the choice}
+    labels = {}
+    if Labeler is not None:
+        labels = Labeler(scheme, choices)
+    lines = {label: c for c, label in labels.items()}
+
+    choice_lines = '\n'.join(str(labels.get(c, c)) for c in choices)
+    choice, errors = dmenu.communicate(choice_lines.encode('utf-8'))
+
+    if dmenu.returncode not in [0, 1] \
+       or (dmenu.returncode == 1 and len(errors) != 0):
+        raise LauncherError("'{} {}' returned {} and error:\n{}"
+                            .format([MenuLauncher], ' '.join(args), dmenu.returncode,
+                                    errors.decode('utf-8')))
+
+    choice = choice.decode('utf-8').rstrip()
+
+    # dmenu prints one line per item selected with Ctrl+Return
+    if Multi:
+        selected = []
+        for line in choice.split('\n'):
+            line = lines.get(line, line)
+            if line in choices:
+                selected.append(scheme.prefix + "/" + line + scheme.suffix)
+            elif line and scheme.allownonmatch:
+                selected.append(line)
+        if not selected:
+            raise Cancelled()
+        return selected
+
+    choice = lines.get(choice, choice)
+
+    if choice in choices:
+        if (CostumChoice != None):
+            return choice
+        else:
+            return (scheme.prefix + "/" + choice + scheme.suffix) 
+    else:
+        if scheme.allownonmatch or NoChoice:
+            return (choice)
+        else:
+            raise Cancelled()
+
+def take_action(scheme, choice):
+    
+    if (scheme.target == "all"):
+        unified_action(choice)
+
+    if (scheme.target == "pass"):
+        sessionID = bw_get_session(scheme)
+        result = subprocess.run(['bw', 'get', 'password', choice, '--session', sessionID], stdout=subprocess.PIPE)
+        if result.stdout != b'':
+            clipboard = subprocess.Popen(['xclip', '-selection', 'clipboard'],
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+            clipboard.communicate(result.stdout)
+            spawn_background(scheme, 'clear-clipboard', hashlib.sha256(result.stdout).hexdigest().encode('utf-8'))
+        del result
+
+        if time.time() - os.stat(CacheDir + '/bw-names.json').st_mtime > PassIndexTTL:
+            spawn_background(scheme, 'pass-index')
+
+    if (scheme.target == "apps"):
+        run_subprocess('exo-open ' + shlex.quote(choice))
+
+    if (scheme.target == "search"):
+        if choice == '':
+            raise Cancelled()
+        if not os.path.exists(scheme.prefix + "/" + choice):
+            results = search_lookup(scheme, choice)
+            if not results:
+                return
+            choice = dmenu_call(scheme, choice, results)
+            if choice not in results:
+                raise Cancelled()
+        search_remember(choice)
+        # File names are no shell code, whatever they contain
+        run_subprocess('exo-open ' + shlex.quote(scheme.prefix + "/" + choice))
+
+    if (scheme.target == "notes"):
+        if not os.path.isfile(format(choice)):
+            results = notes_search(scheme, choice)
+            if not results:
+                return
+            labels = {note: note + '  (' + '{:.1f}'.format(score) + ')' for note, score in results}
+            choice = dmenu_call(scheme, choice, list(labels), Labeler=lambda scheme, choices: labels)
+            if choice not in labels:
+                raise Cancelled()
+            choice = scheme.prefix + "/" + choice + scheme.suffix
+        run_subprocess('exo-open ' + shlex.quote(choice))
+
+    if (scheme.target == "remmina"):
+        run_subprocess('remmina -c ' + shlex.quote(choice))
+
+
+    if (scheme.target == "websearch"):
+        #print(choice)
+        if os.path.isfile(scheme.prefix + "/" + choice + scheme.suffix):
+            choice = scheme.prefix + "/" + choice + scheme.suffix
+        if re.match(r'^[a-z][a-z0-9+.-]*://\S+$', choice):
+            # History URLs come from pages, never let the shell read them
+            run_subprocess(Browser + ' ' + shlex.quote(choice))
+            return
+        if os.path.isfile(format(choice)):
+            #print ("File exist")
+            link = websearch_templates(scheme)[choice[len(scheme.prefix + "/"):-len(scheme.suffix)]]
+            searchSTR = dmenu_call(scheme, "Search", None, True)
+            if searchSTR:
+                link = link.replace("[SEARCH]", urllib.parse.quote(searchSTR))
+                run_subprocess(Browser + ' ' + shlex.quote(link))
+        else:
+            keyword, _, searchSTR = choice.partition(' ')
+            searchFiles = websearch_templates(scheme)
+            for searchFile in searchFiles:
+                if searchFile.split('-', 1)[0] == keyword:
+                    link = searchFiles[searchFile]
+                    if searchSTR:
+                        link = link.replace("[SEARCH]", urllib.parse.quote(searchSTR))
+                        run_subprocess(Browser + ' ' + shlex.quote(link))
+                    return
+
+            if keyword.startswith('!') and os.path.isfile(scheme.prefix + '/bangs.db'):
+                link = bangs_lookup(scheme, keyword[1:])
+                if link is None:
+                    bangs = bangs_complete(scheme, keyword[1:])
+                    labels = {bang: '!' + bang + ' - ' + name for bang, (name, url) in bangs.items()}
+                    bang = dmenu_call(scheme, "Bang", list(bangs), Labeler=lambda scheme, choices: labels)
+                    if bang not in bangs:
+                        raise Cancelled()
+                    link = bangs[bang][1]
+                if not searchSTR:
+                    searchSTR = dmenu_call(scheme, "Search", None, True)
+                if searchSTR:
+                    link = link.replace("[SEARCH]", urllib.parse.quote(searchSTR))
+                    run_subprocess(Browser + ' ' + shlex.quote(link))
+                return
+
+            if choice:
+                link = searchFiles[DefaultSearch]
+                link = link.replace("[SEARCH]", urllib.parse.quote(choice))
+                run_subprocess(Browser + ' ' + shlex.quote(link))
+
+    if (scheme.target == "remote"):
+        protocolChoice = []
+
+        if(not os.path.isfile(format(choice))):
+            if(format(choice).startswith('#')):
+                remote_tag_query(scheme, choice)
+
+            elif(format(choice).lower().endswith(' add')):
+                #print('add New Host')
+                spl_string = choice.split()
+                rm = spl_string[:-1]
+                choice = ' '.join([str(elem) for elem in rm])
+                choice = format(scheme.prefix + "/" + choice + scheme.suffix)
+                #print(choice)
+                
+                #print('Add a protocol to ' + choice)
+                #dmenu_call(scheme, Prompt=None, CostumChoice=None, NoChoice=False, Password=False)
+                tmpJSON = {}
+                tmparr = ['rdp','ssh','web','vnc']
+                tmpJSON['protocol'] = dmenu_call(scheme,'Protocol',tmparr).lower()
+
+
+                if(tmpJSON['protocol'] == 'rdp'):
+                    tmpJSON['host'] = dmenu_call(scheme,'Host/IP',None,True)
+                    tmpName = dmenu_call(scheme,'Custom Name',None,True)
+                    if(tmpName != ''):
+                        tmpJSON['name'] = tmpName
+                    tmpJSON['authMeth'] = 'pass'
+                    templist = bw_list(scheme)
+                    BWNameArray = []
+                    for i in templist:
+                        BWNameArray.append(i['name'])
+                    AccountNameChoise = dmenu_call(scheme,'UserID from Bitwarden',BWNameArray)
+                    for i in templist:
+                        if(i['name'] == AccountNameChoise):
+                            tmpJSON['UserID'] = i['id']
+                    
+                    
+                if(tmpJSON['protocol'] == 'ssh'):
+                    tmpJSON['host'] = dmenu_call(scheme,'Host/IP',None,True)
+                    tmpJSON['port'] = dmenu_call(scheme,'port number',[22])
+                    tmpName = dmenu_call(scheme,'Custom Name',None,True)
+                    if(tmpName != ''):
+                        tmpJSON['name'] = tmpName
+                    tmpJSON['authMeth'] = dmenu_call(scheme,'Authentication Method',['key','pass'])
+                    templist = bw_list(scheme)
+                    BWNameArray = []
+                    for i in templist:
+                        if(tmpJSON['authMeth'] == 'key'):
+                            if('attachments' in i ):
+                                BWNameArray.append(i['name'])
+                        else:
+                            BWNameArray.append(i['name'])
+                    AccountNameChoise = dmenu_call(scheme,'UserID from Bitwarden',BWNameArray)
+                    for i in templist:
+                        if(i['name'] == AccountNameChoise):
+                            tmpJSON['UserID'] = i['id']
+                            if(tmpJSON['authMeth'] == 'key'):
+                                if('attachments' in i ):
+                                    if (len(i['attachments']) > 1):
+                                        tmpJSON['keyFile'] = dmenu_call(scheme,'UserID from Bitwarden',i['attachments'])
+                                    else:
+                                        tmpJSON['keyFile'] = i['attachments'][0]
+
+                    tmpJSON['option'] = isSSHcompatibleWithHost(tmpJSON['host'],tmpJSON['port'])
+                    
+                    
+                if(tmpJSON['protocol'] == 'web'):
+                    tmpJSON['url'] = dmenu_call(scheme,'URL',None,True)
+                    tmpName = dmenu_call(scheme,'Custom Name',None,True)
+                    if(tmpName != ''):
+                        tmpJSON['name'] = tmpName
+                    tmpBrowser = dmenu_call(scheme,'Browser command',None,True)
+                    if(tmpBrowser != ''):
+                        tmpJSON['browser'] = tmpBrowser
+                    
+
+                if(tmpJSON['protocol'] == 'vnc'):
+                    tmpJSON['host'] = dmenu_call(scheme,'Host/IP',None,True)
+                    tmpName = dmenu_call(scheme,'Custom Name',None,True)
+                    if(tmpName != ''):
+                        tmpJSON['name'] = tmpName
+                    tmpJSON['authMeth'] = 'pass'
+                    templist = bw_list(scheme)
+                    BWNameArray = []
+                    for i in templist:
+                        BWNameArray.append(i['name'])
+                    AccountNameChoise = dmenu_call(scheme,'UserID from Bitwarden',BWNameArray)
+                    for i in templist:
+                        if(i['name'] == AccountNameChoise):
+                            tmpJSON['UserID'] = i['id']
+                    
+                if(tmpJSON['protocol'] == 'vnc' and tmpJSON['host'] != '' and tmpJSON['UserID'] != '' or tmpJSON['protocol'] == 'web' and tmpJSON['url'] != '' or tmpJSON['protocol'] == 'ssh' and tmpJSON['host'] != '' and tmpJSON['UserID'] != '' and tmpJSON['authMeth'] != '' or tmpJSON['protocol'] == 'rdp' and tmpJSON['host'] != '' and tmpJSON['UserID'] != '' ): 
+
+                    if(os.path.isfile(choice)):
+                        HostJSON = json.loads(open(format(choice), "r").read())
+                        HostJSON['protocols'].append(tmpJSON)
+
+                        write_json(HostJSON,format(choice))    
+                    else:
+                        # Create New File
+                        HostJSON = {}
+                        HostJSON['protocols'] = [tmpJSON]
+
+                        write_json(HostJSON,format(choice))
+
+            elif(format(choice).lower().endswith(' del')):
+                #print('delete existing protocol')
+                spl_string = choice.split()
+                rm = spl_string[:-1]
+                choice = ' '.join([str(elem) for elem in rm])
+                choice = format(scheme.prefix + "/" + choice + scheme.suffix)
+                #print(choice)
+                if(os.path.isfile(choice)):
+                    HostJSON = json.loads(open(format(choice), "r").read())
+                    choiceArrayNumber = 0
+                    if (len(HostJSON['protocols']) > 1):
+                        tmparr = []
+                        for protocol in HostJSON['protocols']:
+                            #print(protocol['protocol'])
+                            if "name" in protocol:
+                                tmparr.insert(0, protocol['name'])
+                            else:
+                                tmparr.insert(0, protocol['protocol'])
+                        
+                        tmparr.append('All')
+                        tmp = dmenu_call(scheme,'Protocol',tmparr)
+
+                        tmpcounter = 0
+                        if(tmp == 'All'):
+                            choiceArrayNumber = -99
+                        else:
+                            for protocol in HostJSON['protocols']:
+                                if "name" in protocol:
+                                    if (protocol['name'] == tmp):
+                                        protocolChoice = protocol
+                                        choiceArrayNumber = tmpcounter
+                                else:
+                                    if (protocol['protocol'] == tmp):
+                                        protocolChoice = protocol
+                                        choiceArrayNumber = tmpcounter
+                                tmpcounter+=1
+
+                        approval = dmenu_call(scheme,'Are You Sure ?',['No','Yes']).lower()
+                        if(approval == 'yes'):
+                            if(choiceArrayNumber >= 0):
+                                HostJSON['protocols'].pop(choiceArrayNumber)
+                                write_json(HostJSON,format(choice))
+                            else:
+                                os.remove(choice)
+
+                    else:
+                        approval = dmenu_call(scheme,'Are You Sure ?',['No','Yes']).lower()
+                        if(approval == 'yes'):
+                            os.remove(choice)
+
+            elif(format(choice).lower().endswith(' mod')):
+                print('modify existing protocol')
+
+            return
+
+        HostJSON, choiceArrayNumber = remote_choose_protocol(scheme, choice)
+        Session = session_find(choice, choiceArrayNumber)
+        if Session is not None:
+            tmp = dmenu_call(scheme, 'Already connected', ['Focus existing', 'New session'])
+            if (tmp == 'Focus existing'):
+                # Without a window to raise a new connection is started
+                if session_focus(Session):
+                    return
+            elif (tmp != 'New session'):
+                raise Cancelled()
+
+        Timings = {}
+        TempFiles, Process = remote_connect(scheme, HostJSON['protocols'][choiceArrayNumber], Timings=Timings)
+        session_register(choice, choiceArrayNumber, HostJSON['protocols'][choiceArrayNumber], Process)
+        latency_start(scheme, [(choice, HostJSON, choiceArrayNumber, Process, Timings)])
+        remote_finish(TempFiles)
+        remote_record_connection(choice, HostJSON, choiceArrayNumber)
+
+def speculate(scheme):
+    """Start the work the action after the menu will likely need while the user is typing.
+
+    Results are kept as futures in Speculation and read through speculation_result;
+    the returned executor is shut down when run_menu ends, however the menu ended.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    if (scheme.target == "remote"):
+        Speculation['session'] = executor.submit(bw_check_session)
+        Speculation['prefetch'] = executor.submit(credential_daemon_start, scheme)
+        Speculation['hosts'] = executor.submit(read_host_jsons, scheme)
+        Speculation['utils'] = executor.submit(check_req_utils_quiet,
+            [ConsoleLaunchCommand, 'ssh-add', 'ssh-keygen', 'wmctrl', 'xdotool', 'vncpasswd'])
+    if (scheme.target == "websearch"):
+        Speculation['templates'] = executor.submit(read_websearch_templates, scheme)
+    if (scheme.target == "notes"):
+        Speculation['notes'] = executor.submit(notes_index, scheme)
+    return executor
+
+def speculation_result(name):
+    """Return the result of a speculative task, or None if it was not started, cancelled or failed."""
+    future = Speculation.get(name)
+    if future is None or future.cancelled():
+        return None
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+def check_req_utils_quiet(utils):
+    """Resolve utils into the find_util cache without exiting on missing ones."""
+    for util in utils:
+        find_util(util.split(' ', 1)[0])
+
+def read_host_jsons(scheme):
+    """Return {path: (mtime, HostJSON)} of every remote host file."""
+    hosts = {}
+    for choice in dmenu_choices(scheme):
+        path = scheme.prefix + "/" + choice + scheme.suffix
+        hosts[path] = (os.stat(path).st_mtime, read_json(path))
+    return hosts
+
+def read_host_json(choice):
+    """Return a host file's JSON, taken from the speculative pre-parse when the file did not change since."""
+    hosts = speculation_result('hosts')
+    if hosts is not None and choice in hosts and hosts[choice][0] == os.stat(choice).st_mtime:
+        return hosts.pop(choice)[1]
+    return json.loads(open(format(choice), "r").read())
+
+def read_websearch_templates(scheme):
+    """Return {'<keyword>-<Name>': url template} of every websearch file."""
+    templates = {}
+    for choice in dmenu_choices(scheme):
+        with open(scheme.prefix + "/" + choice + scheme.suffix, 'r') as f:
+            templates[choice] = f.read()
+    return templates
+
+def websearch_templates(scheme):
+    """Return the websearch url templates, preloaded while the menu was open if possible."""
+    templates = speculation_result('templates')
+    if templates is None:
+        templates = read_websearch_templates(scheme)
+    return templates
+
+def bangs_import(scheme, filename):
+    """Load a DuckDuckGo bang list ([{'t': keyword, 's': name, 'u': url, 'r': rank}, ...]) into websearch/bangs.db."""
+    try:
+        with open(os.path.expanduser(filename), 'r', encoding='utf-8') as f:
+            bangs = json.load(f)
+    except (OSError, ValueError) as error:
+        raise LauncherError("Could not read bang list '{}': {}!".format(filename, error))
+
+    rows = {}
+    for bang in bangs:
+        if not isinstance(bang, dict) or not bang.get('t') or '{{{s}}}' not in bang.get('u', ''):
+            continue
+        rows[bang['t'].lower()] = (bang['t'].lower(), bang.get('s', bang['t']), bang['u'].replace('{{{s}}}', '[SEARCH]'), int(bang.get('r', 0) or 0))
+
+    path = scheme.prefix + '/bangs.db'
+    if os.path.exists(path + '.tmp'):
+        os.remove(path + '.tmp')
+    db = sqlite3.connect(path + '.tmp')
+    db.execute('CREATE TABLE bangs (keyword TEXT PRIMARY KEY, name TEXT, url TEXT, rank INTEGER) WITHOUT ROWID')
+    db.executemany('INSERT INTO bangs VALUES (?, ?, ?, ?)', rows.values())
+    db.commit()
+    db.execute('VACUUM')
+    db.close()
+    os.replace(path + '.tmp', path)
+    print("Imported {} bangs into '{}'".format(len(rows), path))
+
+def bangs_lookup(scheme, keyword):
+    """Return the url template of a bang, or None."""
+    db = sqlite3.connect('file:' + urllib.parse.quote(scheme.prefix + '/bangs.db') + '?mode=ro', uri=True)
+    try:
+        row = db.execute('SELECT url FROM bangs WHERE keyword = ?', (keyword.lower(),)).fetchone()
+    finally:
+        db.close()
+    return row[0] if row else None
+
+def bangs_complete(scheme, prefix, limit=500):
+    """Return {keyword: (name, url)} of the highest ranked bangs starting with prefix."""
+    prefix = prefix.lower()
+    db = sqlite3.connect('file:' + urllib.parse.quote(scheme.prefix + '/bangs.db') + '?mode=ro', uri=True)
+    try:
+        # Range scan over the keyword primary key; chr(0x10ffff) sorts after any continuation
+        rows = db.execute('SELECT keyword, name, url FROM bangs WHERE keyword >= ? AND keyword < ? ORDER BY rank DESC, keyword LIMIT ?',
+                          (prefix, prefix + chr(0x10ffff), limit)).fetchall()
+    finally:
+        db.close()
+    return {keyword: (name, url) for keyword, name, url in rows}
+
+def history_db():
+    """Return a connection to the local url index, cache/history.db."""
+    if(not os.path.isdir(CacheDir)):
+        os.makedirs(CacheDir)
+    db = sqlite3.connect(CacheDir + '/history.db', timeout=30)
+    db.execute('CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, mark REAL)')
+    db.execute('CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, title TEXT, score REAL, last REAL, rank REAL)')
+    db.execute('CREATE INDEX IF NOT EXISTS urls_rank ON urls (rank)')
+    db.execute('CREATE TABLE IF NOT EXISTS bookmarks (url TEXT PRIMARY KEY)')
+    return db
+
+def history_visit(db, url, title, when, weight=1):
+    """Add a visit of weight at when (unix time) to the decaying score of url.
+
+    score is the visit count decayed to 'last'; rank = log2(score) + last / half life
+    orders urls like their score decayed to any common point in time, so the
+    menu is an index scan.
+    """
+    halfLife = HistoryHalfLife * 86400
+    row = db.execute('SELECT title, score, last FROM urls WHERE url = ?', (url,)).fetchone()
+    if row is None:
+        score, last = weight, when
+    elif when >= row[2]:
+        score, last = row[1] * 2 ** ((row[2] - when) / halfLife) + weight, when
+        title = title or row[0]
+    else:
+        score, last = row[1] + weight * 2 ** ((when - row[2]) / halfLife), row[2]
+        title = row[0] or title
+    db.execute('INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?)',
+               (url, title or '', score, last, math.log2(score) + last / halfLife))
+
+def history_bookmark(db, url, title, when):
+    """Count a bookmark as HistoryBookmarkWeight visits, once per url."""
+    if db.execute('INSERT OR IGNORE INTO bookmarks VALUES (?)', (url,)).rowcount:
+        history_visit(db, url, title, when, HistoryBookmarkWeight)
+
+def history_read(path, queries):
+    """Return the rows of queries [(sql, parameters)] run on a browser database.
+
+    The database is opened read only; when the browser holds a lock on it, a
+    copy of the database and its write-ahead log is read instead.
+    """
+    try:
+        db = sqlite3.connect('file:' + urllib.parse.quote(path) + '?mode=ro', uri=True, timeout=1)
+        try:
+            return [db.execute(sql, parameters).fetchall() for sql, parameters in queries]
+        finally:
+            db.close()
+    except sqlite3.OperationalError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = tmp + '/' + os.path.basename(path)
+        for suffix in ['', '-wal']:
+            if os.path.isfile(path + suffix):
+                shutil.copyfile(path + suffix, copy + suffix)
+        db = sqlite3.connect(copy)
+        try:
+            return [db.execute(sql, parameters).fetchall() for sql, parameters in queries]
+        finally:
+            db.close()
+
+def history_sync():
+    """Add the browser visits and bookmarks newer than each source's high-water mark to the url index."""
+    db = history_db()
+    marks = dict(db.execute('SELECT source, mark FROM sources'))
+    for pattern in BrowserHistory:
+        for path in glob.glob(os.path.expanduser(pattern)):
+            try:
+                if path.endswith('places.sqlite'):
+                    # Firefox: visit_date and dateAdded are microseconds
+                    visitMark = marks.get(path, 0)
+                    bookmarkMark = marks.get(path + '#bookmarks', 0)
+                    visits, bookmarks = history_read(path, [
+                        ('SELECT p.url, p.title, v.visit_date FROM moz_historyvisits v JOIN moz_places p ON p.id = v.place_id '
+                         'WHERE v.visit_date > ? ORDER BY v.visit_date', (visitMark,)),
+                        ('SELECT p.url, b.title, b.dateAdded FROM moz_bookmarks b JOIN moz_places p ON p.id = b.fk '
+                         'WHERE b.type = 1 AND b.dateAdded > ? ORDER BY b.dateAdded', (bookmarkMark,))])
+                    for url, title, when in visits:
+                        history_visit(db, url, title, when / 1e6)
+                    for url, title, when in bookmarks:
+                        if not url.startswith('place:'):
+                            history_bookmark(db, url, title, when / 1e6)
+                    marks[path] = max([visitMark] + [v[2] for v in visits])
+                    marks[path + '#bookmarks'] = max([bookmarkMark] + [b[2] for b in bookmarks])
+                elif path.endswith('.sqlite'):
+                    # qutebrowser: atime is seconds
+                    mark = marks.get(path, 0)
+                    visits, = history_read(path, [
+                        ('SELECT url, title, atime FROM History WHERE atime > ? AND NOT redirect ORDER BY atime', (mark,))])
+                    for url, title, when in visits:
+                        history_visit(db, url, title, when)
+                    marks[path] = max([mark] + [v[2] for v in visits])
+                else:
+                    # qutebrowser bookmarks ('url title') and quickmarks ('name url'), revisited when the file changes
+                    mtime = os.stat(path).st_mtime
+                    if mtime <= marks.get(path, 0):
+                        continue
+                    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                        for line in f:
+                            words = line.split()
+                            urls = [w for w in words if '://' in w]
+                            if urls:
+                                history_bookmark(db, urls[0], ' '.join(w for w in words if w != urls[0]), mtime)
+                    marks[path] = mtime
+            except (OSError, sqlite3.Error):
+                continue
+    db.executemany('INSERT OR REPLACE INTO sources VALUES (?, ?)', marks.items())
+    db.commit()
+    db.close()
+
+def history_menu(scheme):
+    """Return {url: 'title  url'} of the HistoryMenuSize most frecent urls, syncing the index in the background when it is stale."""
+    if not HistoryMenuSize:
+        return {}
+    path = CacheDir + '/history.db'
+    if not os.path.isfile(path) or time.time() - os.stat(path).st_mtime > HistorySyncInterval:
+        if any(glob.glob(os.path.expanduser(pattern)) for pattern in BrowserHistory):
+            spawn_background(scheme, 'history')
+    if not os.path.isfile(path):
+        return {}
+
+    db = sqlite3.connect('file:' + urllib.parse.quote(path) + '?mode=ro', uri=True)
+    try:
+        rows = db.execute('SELECT url, title FROM urls ORDER BY rank DESC LIMIT ?', (HistoryMenuSize,)).fetchall()
+    except sqlite3.Error:
+        rows = []
+    finally:
+        db.close()
+    return {url: (title[:80] + '  ' + url if title else url) for url, title in rows}
+
+def unified_choices():
+    """Return the merged '<prompt>: <choice>' lines of the UnifiedTargets menus.
+
+    The lines are cached with the mtimes of every walked directory and of the
+    Remmina profiles the labels are read from, so the cache is reused until an
+    entry is added, removed or a profile is edited.
+    """
+    path = CacheDir + '/menu-all.json'
+    cache = read_json(path, {'targets': [], 'dirs': {}, 'entries': {}})
+    if cache.get('targets') == UnifiedTargets and 'entries' in cache and 'files' in cache:
+        for basedir, mtime in cache['dirs'].items():
+            if not os.path.isdir(basedir) or os.stat(basedir).st_mtime != mtime:
+                break
+        else:
+            for filename, mtime in cache['files'].items():
+                if not os.path.isfile(filename) or os.stat(filename).st_mtime != mtime:
+                    break
+            else:
+                return list(cache['entries'])
+
+    visited = {}
+    files = {}
+    entries = {}
+    for target in UnifiedTargets:
+        scheme = dmenu_scheme(target, check=False)
+        if os.path.isdir(scheme.prefix):
+            choices = dmenu_choices(scheme, visited)
+            labels = {}
+            if target == 'remmina':
+                labels = remmina_labels(scheme, choices)
+                for choice in choices:
+                    filename = scheme.prefix + "/" + choice + scheme.suffix
+                    files[filename] = os.stat(filename).st_mtime
+            for choice in choices:
+                entries[scheme.p + ': ' + labels.get(choice, choice)] = [target, choice]
+
+    write_json({'targets': UnifiedTargets, 'dirs': visited, 'files': files, 'entries': entries}, path)
+    return list(entries)
+
+def unified_action(choice):
+    """Route a choice of the --all menu to the menu its prompt prefix belongs to."""
+    entries = read_json(CacheDir + '/menu-all.json', {'entries': {}})['entries']
+    if choice in entries:
+        target, choice = entries[choice]
+    else:
+        for target in UnifiedTargets:
+            scheme = dmenu_scheme(target, check=False)
+            if choice.startswith(scheme.p + ': '):
+                choice = choice[len(scheme.p + ': '):]
+                break
+        else:
+            # Text without a known prefix: '#tags' filter remote hosts, anything else is a web search
+            target = 'remote' if choice.startswith('#') else 'websearch'
+
+    scheme = dmenu_scheme(target)
+    if os.path.isfile(scheme.prefix + "/" + choice + scheme.suffix):
+        choice = scheme.prefix + "/" + choice + scheme.suffix
+    elif not scheme.allownonmatch or not choice:
+        raise Cancelled()
+    take_action(scheme, choice)
+
+def remmina_index(scheme, choices):
+    """Return {choice: {'name', 'server', 'protocol'}} of Remmina profiles, cached and revalidated by mtime."""
+    path = CacheDir + '/remmina-index.json'
+    cache = read_json(path)
+
+    index = {}
+    for choice in choices:
+        filename = scheme.prefix + "/" + choice + scheme.suffix
+        mtime = os.stat(filename).st_mtime
+        if choice in cache and cache[choice]['mtime'] == mtime:
+            index[choice] = cache[choice]
+            continue
+
+        profile = configparser.ConfigParser(interpolation=None, strict=False)
+        # A profile with a broken encoding still gets its readable fields
+        try:
+            with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+                profile.read_file(f)
+        except (OSError, configparser.Error):
+            pass
+        section = profile['remmina'] if profile.has_section('remmina') else {}
+        index[choice] = {
+            'mtime': mtime,
+            'name': section.get('name', ''),
+            'server': section.get('server', ''),
+            'protocol': section.get('protocol', ''),
+        }
+
+    if index != cache:
+        write_json(index, path)
+    return index
+
+def remmina_labels(scheme, choices):
+    """Return readable 'name  [PROTOCOL server]' menu lines for Remmina profile files."""
+    index = remmina_index(scheme, choices)
+
+    labels = {}
+    for choice in choices:
+        profile = index[choice]
+        if profile['name'] == '':
+            continue
+        label = profile['name']
+        if profile['protocol'] or profile['server']:
+            label = label + '  [' + ' '.join(x for x in [profile['protocol'], profile['server']] if x) + ']'
+        labels[choice] = label
+
+    # Two profiles with the same name and server keep their file names to stay selectable
+    seen = {}
+    for choice, label in labels.items():
+        seen[label] = seen.get(label, 0) + 1
+    return {choice: label for choice, label in labels.items() if seen[label] == 1}
+
+def pass_index(scheme, sessionID=None):
+    """Return the cached [{'id', 'name', 'username'}] of Bitwarden logins, listing the vault when sessionID is given or nothing is cached."""
+    path = CacheDir + '/bw-names.json'
+    if sessionID is None and os.path.isfile(path):
+        return read_json(path, [])
+
+    if sessionID is None:
+        sessionID = bw_get_session(scheme)
+    index = []
+    for i in bw_list_items(sessionID):
+        if 'login' in i and i['login'].get('password'):
+            index.append({'id': i['id'], 'name': i['name'], 'username': i['login'].get('username') or ''})
+    index.sort(key=lambda i: i['name'].lower())
+
+    write_json(index, path)
+    os.chmod(path, 0o600)
+    return index
+
+def pass_labels(scheme, choices):
+    """Return 'name  [username]' menu lines for Bitwarden ids, unique even for items with the same name."""
+    index = {i['id']: i for i in read_json(CacheDir + '/bw-names.json', [])}
+
+    labels = {}
+    seen = set()
+    for id in choices:
+        label = index[id]['name']
+        if index[id]['username']:
+            label = label + '  [' + index[id]['username'] + ']'
+        if label in seen:
+            label = label + '  (' + id[:8] + ')'
+        seen.add(label)
+        labels[id] = label
+    return labels
+
+def clipboard_clear(digest, delay):
+    """Clear the clipboard after delay seconds, unless something else than the secret with this sha256 was copied since."""
+    time.sleep(delay)
+    result = subprocess.run(['xclip', '-selection', 'clipboard', '-o'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if hashlib.sha256(result.stdout).hexdigest() == digest:
+        subprocess.run(['xclip', '-selection', 'clipboard', '-i', '/dev/null'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def notes_terms(text):
+    """Return {term: count} of a note's text."""
+    terms = {}
+    for term in re.findall(r'\w{2,}', text.lower()):
+        terms[term] = terms.get(term, 0) + 1
+    return terms
+
+def notes_index(scheme):
+    """Return the full-text index of the notes, updated for notes whose mtime or size changed.
+
+    The gzipped index holds 'docs': [[note, mtime, size, length] or None] and
+    'postings': {term: [doc, count, doc, count, ...]}.
+    """
+    path = CacheDir + '/notes-index.json.gz'
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {'docs': [], 'postings': {}}
+
+    current = {}
+    for choice in dmenu_choices(scheme):
+        stat = os.stat(scheme.prefix + "/" + choice + scheme.suffix)
+        current[choice] = (stat.st_mtime, stat.st_size)
+
+    known = {doc[0]: n for n, doc in enumerate(index['docs']) if doc is not None}
+    stale = set(n for choice, n in known.items()
+                if choice not in current or tuple(index['docs'][n][1:3]) != current[choice])
+    added = [choice for choice in current if choice not in known or known[choice] in stale]
+    if not stale and not added:
+        return index
+
+    for n in stale:
+        index['docs'][n] = None
+    for term in list(index['postings']):
+        postings = index['postings'][term]
+        kept = []
+        for i in range(0, len(postings), 2):
+            if postings[i] not in stale:
+                kept += postings[i:i + 2]
+        if kept:
+            index['postings'][term] = kept
+        else:
+            del index['postings'][term]
+
+    # Reuse the slots of removed notes before growing the list
+    free = sorted(stale)
+    for choice in added:
+        try:
+            with open(scheme.prefix + "/" + choice + scheme.suffix, 'r', errors='replace') as f:
+                terms = notes_terms(f.read())
+        except OSError:
+            continue
+        n = free.pop(0) if free else len(index['docs'])
+        if n == len(index['docs']):
+            index['docs'].append(None)
+        index['docs'][n] = [choice, current[choice][0], current[choice][1], sum(terms.values())]
+        for term, count in terms.items():
+            index['postings'].setdefault(term, []).extend([n, count])
+
+    if(not os.path.isdir(CacheDir)):
+        os.makedirs(CacheDir)
+    with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+    return index
+
+def notes_search(scheme, query):
+    """Return [(note, score)] of the notes matching query, best first (BM25).
+
+    Query words missing from the index match every indexed word they start.
+    """
+    index = speculation_result('notes')
+    if index is None:
+        index = notes_index(scheme)
+
+    docs = index['docs']
+    live = [doc for doc in docs if doc is not None]
+    if not live:
+        return []
+    average = sum(doc[3] for doc in live) / len(live)
+
+    terms = None
+    scores = {}
+    for word in notes_terms(query):
+        if word in index['postings']:
+            matches = [word]
+        else:
+            if terms is None:
+                terms = sorted(index['postings'])
+            start = bisect.bisect_left(terms, word)
+            matches = []
+            while start < len(terms) and terms[start].startswith(word):
+                matches.append(terms[start])
+                start += 1
+
+        for term in matches:
+            postings = index['postings'][term]
+            idf = math.log(1 + (len(live) - len(postings) / 2 + 0.5) / (len(postings) / 2 + 0.5))
+            for i in range(0, len(postings), 2):
+                doc, count = postings[i], postings[i + 1]
+                tf = count * 2.2 / (count + 1.2 * (0.25 + 0.75 * docs[doc][3] / average))
+                scores[doc] = scores.get(doc, 0) + idf * tf
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(docs[doc][0], score) for doc, score in ranked]
+
+def varint(number):
+    """Return number as LEB128 bytes."""
+    data = bytearray()
+    while True:
+        byte = number & 0x7f
+        number >>= 7
+        if number:
+            data.append(byte | 0x80)
+        else:
+            data.append(byte)
+            return bytes(data)
+
+def read_varint(data, pos):
+    """Return (number, next position) of the LEB128 number at data[pos]."""
+    number = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (number, pos)
+        shift += 7
+
+def search_walk(scheme, previous):
+    """Return {dir: [mtime, subdirs, files]} below scheme.prefix, reusing the listing of directories whose mtime did not change."""
+    tree = {}
+    pending = ['']
+    while pending:
+        reldir = pending.pop()
+        path = scheme.prefix + "/" + reldir if reldir else scheme.prefix
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+
+        if reldir in previous and previous[reldir][0] == mtime:
+            tree[reldir] = previous[reldir]
+        else:
+            dirs = []
+            files = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if SearchSkipHidden and entry.name.startswith('.'):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                dirs.append(entry.name)
+                            else:
+                                files.append(entry.name)
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            tree[reldir] = [mtime, dirs, files]
+
+        for d in tree[reldir][1]:
+            pending.append(reldir + "/" + d if reldir else d)
+    return tree
+
+def search_index_build(scheme):
+    """Refresh the --search file name index from the directories that changed since the last run.
+
+    The index is a sorted list of 'lowercase name\\0relative path' keys, front
+    compressed (varint shared prefix length, varint suffix length, suffix) with
+    a full key every 64 entries, followed by the offsets of those restart
+    points and a footer with the entry and restart counts.
+    """
+    treePath = CacheDir + '/search-tree.json.gz'
+    try:
+        with gzip.open(treePath, 'rt', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    if previous.get('prefix') != scheme.prefix:
+        previous = {'prefix': scheme.prefix, 'tree': {}}
+
+    tree = search_walk(scheme, previous['tree'])
+    path = CacheDir + '/search.idx'
+    if tree == previous['tree'] and os.path.isfile(path):
+        os.utime(path)
+        return
+
+    keys = []
+    for reldir, (mtime, dirs, files) in tree.items():
+        for name in dirs + files:
+            relpath = reldir + "/" + name if reldir else name
+            keys.append((name.lower() + '\0' + relpath).encode('utf-8', 'surrogateescape'))
+    keys.sort()
+
+    if(not os.path.isdir(CacheDir)):
+        os.makedirs(CacheDir)
+    # Per process temporary files, a menu and a background task may build at the same time
+    tmp = '.{}.tmp'.format(os.getpid())
+    restarts = []
+    with open(path + tmp, 'wb') as f:
+        f.write(b'DLIDX1\n\0')
+        offset = 8
+        last = b''
+        for n, key in enumerate(keys):
+            shared = 0
+            if n % 64 == 0:
+                restarts.append(offset)
+            else:
+                limit = min(len(last), len(key))
+                while shared < limit and last[shared] == key[shared]:
+                    shared += 1
+            entry = varint(shared) + varint(len(key) - shared) + key[shared:]
+            f.write(entry)
+            offset += len(entry)
+            last = key
+        for restart in restarts:
+            f.write(struct.pack('<Q', restart))
+        f.write(struct.pack('<QQ', len(keys), len(restarts)))
+    os.replace(path + tmp, path)
+
+    with gzip.open(treePath + tmp, 'wt', encoding='utf-8') as f:
+        json.dump({'prefix': scheme.prefix, 'tree': tree}, f, separators=(',', ':'))
+    os.replace(treePath + tmp, treePath)
+
+def search_index_refresh(scheme):
+    """Start a background rebuild of the --search index when it is missing or older than SearchIndexTTL."""
+    path = CacheDir + '/search.idx'
+    if not os.path.isfile(path):
+        spawn_background(scheme, 'search-index')
+    elif time.time() - os.stat(path).st_mtime > SearchIndexTTL:
+        # Counts as fresh while the rebuild runs, so the lookup does not start another one
+        os.utime(path)
+        spawn_background(scheme, 'search-index')
+
+def search_lookup(scheme, query, limit=5000):
+    """Return the relative paths whose file name starts with the query's first word and that contain all other words."""
+    words = query.lower().split()
+    if not words:
+        return []
+
+    search_index_refresh(scheme)
+    path = CacheDir + '/search.idx'
+    if not os.path.isfile(path):
+        raise LauncherError("The search index is still being built, try again in a moment!")
+
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        count, nrestarts = struct.unpack_from('<QQ', data, len(data) - 16)
+        if count == 0:
+            return []
+        table = len(data) - 16 - nrestarts * 8
+
+        def restart_key(n):
+            pos = struct.unpack_from('<Q', data, table + n * 8)[0]
+            shared, pos = read_varint(data, pos)
+            length, pos = read_varint(data, pos)
+            return data[pos:pos + length]
+
+        # Last restart point whose key sorts before the prefix, then scan forward
+        prefix = words[0].encode('utf-8')
+        low, high = 0, nrestarts
+        while high - low > 1:
+            middle = (low + high) // 2
+            if restart_key(middle) < prefix:
+                low = middle
+            else:
+                high = middle
+
+        results = []
+        pos = struct.unpack_from('<Q', data, table + low * 8)[0]
+        key = b''
+        while pos < table and len(results) < limit:
+            shared, pos = read_varint(data, pos)
+            length, pos = read_varint(data, pos)
+            key = key[:shared] + data[pos:pos + length]
+            pos += length
+            if key.startswith(prefix):
+                relpath = key.split(b'\0', 1)[1].decode('utf-8', 'surrogateescape')
+                if all(word in relpath.lower() for word in words[1:]):
+                    results.append(relpath)
+            elif key > prefix:
+                break
+    finally:
+        data.close()
+    return results
+
+def search_recent():
+    """Return the files recently opened with --search, most recent first."""
+    return read_json(CacheDir + '/search-recent.json', [])
+
+def search_remember(choice):
+    """Put a file opened with --search in front of the recent list."""
+    recent = [choice] + [r for r in search_recent() if r != choice]
+    write_json(recent[:50], CacheDir + '/search-recent.json')
+
+def remote_choose_protocol(scheme, choice):
+    """Return (HostJSON, choiceArrayNumber) for a host file, asking for the protocol if it has several."""
+    HostJSON = read_host_json(choice)
+    choiceArrayNumber = None
+    #print(HostJSON)
+    #print(len(HostJSON['protocols']))
+    if (len(HostJSON['protocols']) > 1):
+        tmparr = []
+        for protocol in HostJSON['protocols']:
+            #print(protocol['protocol'])
+            if "name" in protocol:
+                tmparr.insert(0, protocol['name'])
+            else:
+                tmparr.insert(0, protocol['protocol'])
+        
+        tmp = dmenu_call(scheme,'Protocol',tmparr)
+
+        tmpcounter = 0
+        for protocol in HostJSON['protocols']:
+            if "name" in protocol:
+                if (protocol['name'] == tmp):
+                    choiceArrayNumber = tmpcounter
+            else:
+                if (protocol['protocol'] == tmp):
+                    choiceArrayNumber = tmpcounter
+            tmpcounter+=1
+    else:
+        choiceArrayNumber = 0
+
+    if choiceArrayNumber is None:
+        raise Cancelled()
+    return (HostJSON, choiceArrayNumber)
+
+def remote_connect(scheme, protocolChoice, BWJSON=None, KeyFile=None, Timings=None):
+    """Launch the client for a protocol entry and return (temporary files it reads credentials from, process).
+
+    BWJSON and KeyFile are the already fetched Bitwarden login and SSH key file,
+    they are fetched here when not given. The steps before the launch run as
+    a graph from remote_connect_steps; the ms of each step, of everything
+    before the spawn (credentials) and of the spawn itself are stored in
+    Timings when given.
+    """
+    if (protocolChoice['protocol'].lower() != 'web' and "RDPfile" not in protocolChoice and not remote_hosts(protocolChoice)):
+        raise LauncherError("The {} entry has no host!".format(protocolChoice.get('name', protocolChoice['protocol'])))
+    if (protocolChoice['protocol'].lower() != 'web' and protocolChoice.get('authMeth', '').lower() != 'config'
+            and BWJSON is None and not protocolChoice.get('UserID')):
+        raise LauncherError("'{}' has no Bitwarden item (UserID) yet!".format(', '.join(remote_hosts(protocolChoice)) or protocolChoice.get('name', protocolChoice['protocol'])))
+
+    start = time.monotonic()
+    Steps = run_steps(remote_connect_steps(scheme, protocolChoice, BWJSON, KeyFile), Timings, remote_connect_cleanup)
+    if "race" in Steps:
+        protocolChoice = dict(protocolChoice, host=Steps['race'])
+    BWJSON = Steps.get('login', BWJSON)
+
+    TempFiles = []
+    Process = None
+    try:
+        if (protocolChoice['protocol'].lower() == "vnc"):
+            cmd = 'ssvncviewer '
+            cmd = cmd + Steps['options']
+
+            if "option" in protocolChoice:
+                cmd = cmd + protocolChoice['option'] + ' '
+        
+            cmd = cmd + '-passwd <(vncpasswd -f <<<"' + BWJSON['password'] + '") '
+            cmd = cmd + protocolChoice['host'] +' '
+
+            Process = remote_spawn(cmd, start, Timings)
+
+
+        if (protocolChoice['protocol'].lower() == "ssh"):
+            AgentKey = Steps.get('agent')
+            if Steps.get('attachment') is not None:
+                KeyFile = Steps['attachment']
+                if Steps['key'] is not None:
+                    AgentKey = Steps['key']
+                    os.remove(KeyFile)
+                else:
+                    TempFiles.append(KeyFile)
+
+            cmd = 'ssh -o StrictHostKeyChecking=no '
+            cmd = cmd + Steps['options']
+
+            if "option" in protocolChoice:
+                cmd = cmd + protocolChoice['option'] + ' '
+
+            if "port" in protocolChoice:
+                cmd = cmd + '-p ' + protocolChoice['port'] + ' '
+
+            if (protocolChoice['authMeth'].lower() == 'key'):
+                if AgentKey is None:
+                    cmd = cmd + '-i ' + KeyFile + ' '
+                else:
+                    cmd = cmd + '-o IdentitiesOnly=yes -i ' + AgentKey['pubkey'] + ' '
+
+            if (protocolChoice['authMeth'].lower() == 'pass'):
+                TempFile = create_tmp_file_mkstemp(BWJSON['password'])
+                TempFiles.append(TempFile)
+                cmd = 'sshpass -f ' + TempFile + ' ' + cmd
+            
+            if (protocolChoice['authMeth'].lower() == 'config'):
+                cmd = cmd + protocolChoice['host']
+            else:
+                cmd = cmd  + BWJSON['username'] + '@' + protocolChoice['host']
+            cmd = ConsoleLaunchCommand + " " + cmd
+
+            #print(cmd)
+            Process = remote_spawn(cmd, start, Timings)
+
+
+        if (protocolChoice['protocol'].lower() == "web"):
+            if ("browser" in protocolChoice):
+                run_subprocess(protocolChoice['browser'] + ' ' + shlex.quote(protocolChoice['url']))
+            else:
+                run_subprocess(Browser + ' ' + shlex.quote(protocolChoice['url']))
+
+
+        if (protocolChoice['protocol'].lower() == "rdp"):
+            cmd = 'xfreerdp '
+            if ("RDPfile" in protocolChoice):
+                cmd = cmd + ScriptDir + '/remote/' + protocolChoice['RDPfile'] + ' '
+            cmd = cmd + Steps['options'] + ' '
+            #cmd = cmd + '/console '
+            #cmd = cmd + '-decorations '
+            cmd = cmd + '/audio-mode:0 '
+            cmd = cmd + '/mic:format:1 '
+            cmd = cmd + '/sound:latency:50 '
+            cmd = cmd + '+auto-reconnect '
+            cmd = cmd + '/auto-reconnect-max-retries:4 '
+            #cmd = cmd + '/span '         #Span screen over multiple monitors
+            #cmd = cmd + '/multimon '
+            cmd = cmd + '/drive:RDPshare,' + os.path.expanduser(RDPSharedFolder) + ' '
+            #cmd = cmd + '/floatbar '    #[:sticky:[on|off],default:[visible|hidden],show:[always|fullscreen||window]]
+            cmd = cmd + '/w:1900 '
+            cmd = cmd + '/h:1000 '
+            cmd = cmd + '/dynamic-resolution '
+            #cmd = cmd + '/f '            # fullscreen
+            #cmd = cmd + '/title:Duuuud '
+            cmd = cmd + '+clipboard '
+            cmd = cmd + '/cert-ignore '
+            #cmd = cmd + '-heartbeat '
+            if ("SNIdomain" in protocolChoice):
+                cmd = cmd + '/u:\'' + BWJSON['username'] + '@' + BWJSON['SNIdomain'] + '\' '
+            elif ("domain" in protocolChoice):
+                cmd = cmd + '/u:\''+ BWJSON['domain'] + '\\' + BWJSON['username'] + '\' '
+            else:
+                cmd = cmd + '/u:\'' + BWJSON['username'] + '\' '
+            cmd = cmd + '/p:\'' + BWJSON['password'] + '\' '
+            if ("RDPfile" not in protocolChoice):
+                cmd = cmd + '/v:'+ protocolChoice['host'] + ' '
+        
+            Process = remote_spawn(cmd, start, Timings)
+    except BaseException:
+        # Nothing was launched to read them
+        remote_connect_cleanup(Steps)
+        for TempFile in TempFiles:
+            if os.path.isfile(TempFile):
+                os.remove(TempFile)
+        raise
+
+    return (TempFiles, Process)
+
+def remote_connect_cleanup(Steps):
+    """Remove the SSH key file a failed launch already fetched from the vault."""
+    if Steps.get('attachment') is not None and os.path.isfile(Steps['attachment']):
+        os.remove(Steps['attachment'])
+
+def remote_connect_steps(scheme, protocolChoice, BWJSON=None, KeyFile=None):
+    """Return the run_steps graph that prepares the launch of a protocol entry.
+
+    Steps that need the vault wait for one 'session' step, so the unlock prompt
+    shows at most once; once it is known the login and the SSH key attachment
+    are fetched side by side, while the util checks, the endpoint race and the
+    client options of the host entry do not wait for the vault at all. The
+    credential daemon is asked once, in the 'daemon' step, and a login it holds
+    spares the unlock.
+    """
+    protocol = protocolChoice['protocol'].lower()
+    authMeth = protocolChoice.get('authMeth', '').lower()
+    steps = {}
+
+    if protocol == 'ssh':
+        steps['utils'] = (lambda done: check_req_utils([ConsoleLaunchCommand]), [])
+    if protocol == 'web' and "browser" in protocolChoice:
+        steps['utils'] = (lambda done: check_req_utils([protocolChoice['browser']]), [])
+    if protocol == 'web':
+        return steps
+
+    def race(done):
+        protocolChoice['LastEndpoint'] = remote_race(protocolChoice)
+        return protocolChoice['LastEndpoint']
+
+    def options(done):
+        host = dict(protocolChoice, host=done.get('race', protocolChoice['host']))
+        if protocol == 'vnc':
+            return vnc_profile_options(host)
+        if protocol == 'ssh':
+            return ssh_control_options(host)
+        return RDPProfiles[rdp_profile(host)]
+
+    if isinstance(protocolChoice.get('host'), list) and "RDPfile" not in protocolChoice:
+        steps['race'] = (race, [])
+    steps['options'] = (options, ['race'] if 'race' in steps else [])
+
+    useKey = protocol == 'ssh' and authMeth == 'key'
+    useLogin = BWJSON is None and authMeth != 'config'
+    if useKey and KeyFile is None:
+        steps['agent'] = (lambda done: ssh_agent_get_key(protocolChoice), [])
+
+    def needsAttachment(done):
+        return useKey and KeyFile is None and done['agent'] is None
+
+    def session(done):
+        if needsAttachment(done) or (useLogin and done.get('agent') is None and done['daemon'] is None):
+            return bw_get_session(scheme)
+        return None
+
+    def login(done):
+        if done.get('agent') is not None:
+            return {'username': done['agent']['username']}
+        if done['daemon'] is not None:
+            return done['daemon']
+        return bw_get_login(scheme, protocolChoice['UserID'], done['session'], use_daemon=False)
+
+    def attachment(done):
+        if needsAttachment(done):
+            return bw_get_attachment(scheme, protocolChoice['UserID'], protocolChoice['keyFile'], done['session'])
+        return None
+
+    def key(done):
+        if done['attachment'] is None:
+            return None
+        return ssh_agent_add_key(protocolChoice, done['attachment'], done.get('login', BWJSON)['username'])
+
+    # Missing utils end the launch before anything is fetched from the vault
+    vault = [s for s in ['utils', 'agent'] if s in steps]
+    if useLogin:
+        steps['daemon'] = (lambda done: credential_daemon_get(protocolChoice['UserID']), [])
+        vault.append('daemon')
+    if useLogin or (useKey and KeyFile is None):
+        steps['session'] = (session, vault)
+    if useLogin:
+        steps['login'] = (login, vault + ['session'])
+    if useKey and KeyFile is None:
+        steps['attachment'] = (attachment, ['agent', 'session'])
+        steps['key'] = (key, ['attachment'] + (['login'] if useLogin else []))
+    return steps
+
+def remote_hosts(protocolChoice):
+    """Return the candidate addresses of a protocol entry, "host" may be one address or a list; the last winner comes first.
+
+    Empty addresses are left out, so an entry without any host returns [].
+    """
+    hosts = protocolChoice.get('host', '')
+    if not isinstance(hosts, list):
+        hosts = [hosts]
+    hosts = [h for h in hosts if h]
+    if protocolChoice.get('LastEndpoint') in hosts:
+        hosts = [protocolChoice['LastEndpoint']] + [h for h in hosts if h != protocolChoice['LastEndpoint']]
+    return hosts
+
+def remote_race(protocolChoice):
+    """Return the address of a protocol entry that accepts a TCP connection first.
+
+    Happy eyeballs style: the candidates are tried in order, each one RaceDelay
+    after the previous or right after the previous one failed, and all attempts
+    run concurrently until one connects or RaceTimeout passes.
+    """
+    hosts = remote_hosts(protocolChoice)
+    if not hosts:
+        raise LauncherError("The {} entry has no host!".format(protocolChoice.get('name', protocolChoice['protocol'])))
+    if len(hosts) < 2:
+        return hosts[0]
+
+    results = queue.Queue()
+    def attempt(host):
+        endpoint = remote_endpoints({'protocols': [dict(protocolChoice, host=host)]})[0]
+        results.put((host, tcp_rtt(*endpoint, timeout=RaceTimeout)))
+
+    deadline = time.monotonic() + RaceTimeout
+    started = 0
+    finished = 0
+    while finished < len(hosts):
+        if started < len(hosts):
+            # Daemon threads, so attempts still hanging do not delay the launcher's exit
+            threading.Thread(target=attempt, args=(hosts[started],), daemon=True).start()
+            started += 1
+            wait = min(RaceDelay, deadline - time.monotonic())
+        else:
+            wait = deadline - time.monotonic()
+        if wait <= 0:
+            break
+        try:
+            host, rtt = results.get(timeout=wait)
+        except queue.Empty:
+            continue
+        finished += 1
+        if rtt is not None:
+            return host
+    return hosts[0]
+
+def remote_spawn(cmd, start, Timings):
+    """run_subprocess, storing the ms since start (credentials) and of the spawn itself in Timings."""
+    spawn = time.monotonic()
+    Process = run_subprocess(cmd)
+    if Timings is not None:
+        Timings.setdefault('credentials', (spawn - start) * 1000)
+        Timings['spawn'] = (time.monotonic() - spawn) * 1000
+    return Process
+
+def remote_finish(TempFiles):
+    """Give the launched clients time to start and read their credentials, then remove the temporary files.
+
+    The wait runs in a thread that is no daemon: the command line still exits
+    after it, library callers get control back right away.
+    """
+    def finish():
+        if TempFiles:
+            time.sleep(10)
+        else:
+            time.sleep(.5)
+
+        for TempFile in set(TempFiles):
+            if os.path.isfile(TempFile):
+                os.remove(TempFile)
+    threading.Thread(target=finish).start()
+
+def remote_record_connection(choice, HostJSON, choiceArrayNumber):
+    """Count the connection and store its time in the host file."""
+    protocolChoice = HostJSON['protocols'][choiceArrayNumber]
+    if("ConnectionTimes" in protocolChoice):
+        HostJSON['protocols'][choiceArrayNumber]['ConnectionTimes'] = protocolChoice['ConnectionTimes'] + 1
+    else:
+        HostJSON['protocols'][choiceArrayNumber]['ConnectionTimes'] = 1
+
+    HostJSON['protocols'][choiceArrayNumber]['LastConnection'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # theTime = datetime.strptime(HostJSON['protocols'][choiceArrayNumber]['LastConnection'], '%Y-%m-%d %H:%M:%S')
+    # print(theTime.strftime('Year is %Y, Month is %m, Day is %d, and Time is %H:%M:%S'))
+
+    write_json(HostJSON,format(choice))
+
+def remote_connect_many(scheme, choices):
+    """Connect to several host files at once, fetching all their Bitwarden items in one pass."""
+    selections = []
+    for choice in choices:
+        if os.path.isfile(format(choice)):
+            HostJSON, choiceArrayNumber = remote_choose_protocol(scheme, choice)
+            selections.append((choice, HostJSON, choiceArrayNumber))
+    remote_connect_selections(scheme, selections)
+
+def remote_connect_selections(scheme, selections):
+    """Connect to a list of (choice, HostJSON, choiceArrayNumber) in parallel, focusing hosts that are already connected."""
+    pending = []
+    for choice, HostJSON, choiceArrayNumber in selections:
+        Session = session_find(choice, choiceArrayNumber)
+        if Session is None:
+            pending.append((choice, HostJSON, choiceArrayNumber))
+        else:
+            session_focus(Session)
+    selections = pending
+
+    protocolChoices = [HostJSON['protocols'][n] for choice, HostJSON, n in selections]
+    start = time.monotonic()
+    logins, keyFiles = remote_prefetch_credentials(scheme, protocolChoices)
+    # The credentials of all hosts are fetched in one pass, each host is charged the whole pass
+    prefetch = (time.monotonic() - start) * 1000
+
+    def connect(protocolChoice):
+        KeyFile = None
+        if (protocolChoice['protocol'].lower() == 'ssh' and protocolChoice['authMeth'].lower() == 'key'):
+            KeyFile = keyFiles.get(protocolChoice['UserID'] + '/' + protocolChoice['keyFile'])
+        Timings = {'credentials': prefetch}
+        return remote_connect(scheme, protocolChoice, logins.get(protocolChoice.get('UserID')), KeyFile, Timings) + (Timings,)
+
+    TempFiles = list(keyFiles.values())
+    launched = []
+    failed = []
+    failure = None
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=ProbeWorkers) as executor:
+            futures = [executor.submit(connect, protocolChoice) for protocolChoice in protocolChoices]
+        # One host failing must not keep the others from being registered and cleaned up
+        for (choice, HostJSON, choiceArrayNumber), future in zip(selections, futures):
+            try:
+                files, Process, Timings = future.result()
+            except (LauncherError, Cancelled) as error:
+                failed.append("{}: {}".format(choice[len(scheme.prefix + "/"):-len(scheme.suffix)], error))
+                continue
+            except Exception as error:
+                failure = failure or error
+                continue
+            TempFiles += files
+            session_register(choice, choiceArrayNumber, HostJSON['protocols'][choiceArrayNumber], Process)
+            launched.append((choice, HostJSON, choiceArrayNumber, Process, Timings))
+        latency_start(scheme, launched)
+
+        for choice, HostJSON, choiceArrayNumber, Process, Timings in launched:
+            remote_record_connection(choice, HostJSON, choiceArrayNumber)
+    finally:
+        remote_finish(TempFiles)
+
+    if failure is not None:
+        raise failure
+    if failed:
+        raise LauncherError("Could not connect to " + "; ".join(failed))
+
+def process_start_time(pid):
+    """Return the start time of a process (to tell it apart from a later process with the same PID), or None if it is gone."""
+    try:
+        with open('/proc/' + str(pid) + '/stat', 'r') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Fields after the parenthesised command name start with field 3, starttime is field 22
+    return int(stat.rsplit(')', 1)[1].split()[19])
+
+def process_tree(pid):
+    """Return pid and the PIDs of all its descendants."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/' + entry + '/stat', 'r') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids = [pid]
+    for p in pids:
+        pids += children.get(p, [])
+    return pids
+
+def session_list():
+    """Return the registered sessions whose process is still running."""
+    sessions = read_json(CacheDir + '/sessions.json', [])
+    return [s for s in sessions if process_start_time(s['pid']) == s['starttime']]
+
+def session_register(choice, choiceArrayNumber, protocolChoice, Process):
+    """Remember the process launched for a protocol entry, web sessions are left to the browser."""
+    if Process is None or protocolChoice['protocol'].lower() == 'web':
+        return
+
+    sessions = session_list()
+    sessions.append({
+        'pid': Process.pid,
+        'starttime': process_start_time(Process.pid),
+        'choice': choice,
+        'protocol': choiceArrayNumber,
+        'type': protocolChoice['protocol'].lower(),
+        'host': (remote_hosts(protocolChoice) or [''])[0],
+        'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    write_json(sessions, CacheDir + '/sessions.json')
+
+def session_find(choice, choiceArrayNumber):
+    """Return the running session of a protocol entry, or None."""
+    for Session in session_list():
+        if Session['choice'] == choice and Session['protocol'] == choiceArrayNumber:
+            return Session
+    return None
+
+def session_focus(Session):
+    """Raise the window of a running session with wmctrl or xdotool, return False if none was found."""
+    pids = process_tree(Session['pid'])
+
+    if find_util('wmctrl') is not None:
+        result = subprocess.run(['wmctrl', '-lp'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        for line in result.stdout.decode('utf-8').splitlines():
+            window = line.split(None, 3)
+            if len(window) > 2 and window[2].isdigit() and int(window[2]) in pids:
+                subprocess.run(['wmctrl', '-ia', window[0]])
+                return True
+
+    if find_util('xdotool') is not None:
+        for pid in pids:
+            result = subprocess.run(['xdotool', 'search', '--pid', str(pid)], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            windows = result.stdout.decode('utf-8').split()
+            if windows:
+                subprocess.run(['xdotool', 'windowactivate', windows[-1]])
+                return True
+
+    return False
+
+def remote_prefetch_credentials(scheme, protocolChoices):
+    """Fetch the Bitwarden logins and SSH keys needed by several protocol entries concurrently.
+
+    Returns ({UserID: login}, {'UserID/keyFile': key file}), key files are only
+    returned for keys that could not be loaded into ssh-agent.
+    """
+    loginIDs = set()
+    keys = set()
+    for protocolChoice in protocolChoices:
+        protocol = protocolChoice['protocol'].lower()
+        if not protocolChoice.get('UserID'):
+            continue
+        if protocol in ['vnc', 'rdp']:
+            loginIDs.add(protocolChoice['UserID'])
+        if protocol == 'ssh':
+            if (protocolChoice['authMeth'].lower() == 'config'):
+                continue
+            if (protocolChoice['authMeth'].lower() == 'key' and ssh_agent_get_key(protocolChoice) is not None):
+                continue
+            loginIDs.add(protocolChoice['UserID'])
+            if (protocolChoice['authMeth'].lower() == 'key'):
+                keys.add((protocolChoice['UserID'], protocolChoice['keyFile']))
+
+    if not loginIDs:
+        return ({}, {})
+
+    sessionID = bw_get_session(scheme)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ProbeWorkers) as executor:
+        logins = executor.submit(bw_get_logins, scheme, loginIDs, sessionID)
+        attachments = {key: executor.submit(bw_get_attachment, scheme, key[0], key[1], sessionID) for key in keys}
+    logins = logins.result()
+
+    keyFiles = {}
+    for (UserID, keyFile), attachment in attachments.items():
+        KeyFile = attachment.result()
+        if ssh_agent_add_key({'UserID': UserID, 'keyFile': keyFile}, KeyFile, logins[UserID]['username']) is None:
+            keyFiles[UserID + '/' + keyFile] = KeyFile
+        else:
+            os.remove(KeyFile)
+    return (logins, keyFiles)
+
+def latency_start(scheme, launched):
+    """Hand the stage timings of launched sessions [(choice, HostJSON, choiceArrayNumber, Process, Timings)]
+    to a 'latency' background task, which adds the time until each session is established."""
+    sessions = []
+    for choice, HostJSON, choiceArrayNumber, Process, Timings in launched:
+        protocolChoice = HostJSON['protocols'][choiceArrayNumber]
+        if Process is None or not Timings:
+            continue
+        endpoints = remote_endpoints({'protocols': [protocolChoice]})
+        sessions.append({
+            'key': choice[len(scheme.prefix + "/"):-len(scheme.suffix)] + '/' + protocolChoice.get('name', protocolChoice['protocol']),
+            'pid': Process.pid,
+            'starttime': process_start_time(Process.pid),
+            'port': endpoints[0][1] if endpoints else None,
+            'spawned': time.time(),
+            'timings': Timings,
+        })
+    if sessions:
+        spawn_background(scheme, 'latency', json.dumps(sessions).encode('utf-8'))
+
+def process_tcp_established(pid, port):
+    """Return True if a process of pid's tree has an established TCP connection to port."""
+    inodes = set()
+    for p in process_tree(pid):
+        try:
+            for fd in os.listdir('/proc/' + str(p) + '/fd'):
+                link = os.readlink('/proc/' + str(p) + '/fd/' + fd)
+                if link.startswith('socket:['):
+                    inodes.add(link[8:-1])
+        except OSError:
+            continue
+    if not inodes:
+        return False
+
+    for table in ['tcp', 'tcp6']:
+        try:
+            with open('/proc/' + str(pid) + '/net/' + table, 'r') as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # rem_address is 'hexaddress:hexport', state 01 is ESTABLISHED
+                    if fields[3] == '01' and int(fields[2].rsplit(':', 1)[1], 16) == port and fields[9] in inodes:
+                        return True
+        except (OSError, StopIteration, IndexError, ValueError):
+            continue
+    return False
+
+def latency_watch(sessions):
+    """Poll launched sessions until their client holds an established connection, then record their stage timings."""
+    deadline = time.time() + LatencyTimeout
+    pending = [s for s in sessions if s['port'] is not None]
+    while pending and time.time() < deadline:
+        for Session in list(pending):
+            if process_start_time(Session['pid']) != Session['starttime']:
+                pending.remove(Session)
+            elif process_tcp_established(Session['pid'], Session['port']):
+                Session['timings']['established'] = (time.time() - Session['spawned']) * 1000
+                pending.remove(Session)
+        time.sleep(.05)
+
+    path = CacheDir + '/latency.json'
+    latency = read_json(path)
+    for Session in sessions:
+        stages = latency.setdefault(Session['key'], {})
+        for stage, ms in Session['timings'].items():
+            latency_add(stages.setdefault(stage, {'n': 0, 'sum': 0, 'max': 0, 'buckets': {}}), ms)
+    write_json(latency, path)
+
+def latency_add(histogram, ms):
+    """Add a sample to a histogram with quarter-octave buckets (bucket b holds samples around 2**(b/4) ms)."""
+    bucket = str(max(0, round(4 * math.log2(max(ms, 1)))))
+    histogram['n'] += 1
+    histogram['sum'] += ms
+    histogram['max'] = max(histogram['max'], ms)
+    histogram['buckets'][bucket] = histogram['buckets'].get(bucket, 0) + 1
+
+def latency_percentile(histogram, percentile):
+    """Return the approximate percentile (0-100) in ms of a histogram."""
+    rank = histogram['n'] * percentile / 100
+    seen = 0
+    for bucket in sorted(histogram['buckets'], key=int):
+        seen += histogram['buckets'][bucket]
+        if seen >= rank:
+            return min(2 ** (int(bucket) / 4), histogram['max'])
+    return histogram['max']
+
+def latency_report(limit=20):
+    """Print the host stages with the highest 90th percentile latency."""
+    latency = read_json(CacheDir + '/latency.json')
+    rows = []
+    for key, stages in latency.items():
+        for stage, histogram in stages.items():
+            rows.append((latency_percentile(histogram, 90), key, stage, histogram))
+    if not rows:
+        print("No connection timings recorded yet")
+        return
+
+    rows.sort(key=lambda row: row[0], reverse=True)
+    print('{:<40} {:<12} {:>6} {:>9} {:>9} {:>9} {:>9}'.format('host/protocol', 'stage', 'count', 'mean ms', 'p50 ms', 'p90 ms', 'max ms'))
+    for p90, key, stage, histogram in rows[:limit]:
+        print('{:<40} {:<12} {:>6} {:>9.0f} {:>9.0f} {:>9.0f} {:>9.0f}'.format(
+            key[-40:], stage, histogram['n'], histogram['sum'] / histogram['n'],
+            latency_percentile(histogram, 50), p90, histogram['max']))
+
+def hosts_from_ssh_config(path, seen=None):
+    """Yield (name, protocolChoice, addresses) for every Host alias without wildcards of an ssh config file, following Include."""
+    seen = set() if seen is None else seen
+    path = os.path.realpath(os.path.expanduser(path))
+    if path in seen:
+        return
+    seen.add(path)
+
+    aliases = []
+    options = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                words = shlex.split(line, comments=True)
+            except ValueError:
+                continue
+            if not words:
+                continue
+            # 'Key value' and 'Key=value' are both valid
+            if '=' in words[0]:
+                words = words[0].split('=', 1) + words[1:]
+            key = words[0].lower()
+
+            if key == 'include':
+                for pattern in words[1:]:
+                    pattern = os.path.join(os.path.expanduser('~/.ssh'), os.path.expanduser(pattern))
+                    for include in sorted(glob.glob(pattern)):
+                        yield from hosts_from_ssh_config(include, seen)
+            elif key in ['host', 'match']:
+                yield from ssh_config_entries(aliases, options)
+                aliases = [w for w in words[1:] if not any(c in w for c in '*?!')] if key == 'host' else []
+                options = {}
+            elif len(words) > 1:
+                # The first value of a keyword wins in ssh config
+                options.setdefault(key, words[1])
+    yield from ssh_config_entries(aliases, options)
+
+def ssh_config_entries(aliases, options):
+    """Return the import entries of one ssh config Host block."""
+    entries = []
+    for alias in aliases:
+        protocolChoice = {'protocol': 'ssh', 'host': alias, 'authMeth': 'config', 'pending': ['algos']}
+        entries.append((alias, protocolChoice, {alias, options.get('hostname', alias)}))
+    return entries
+
+def hosts_from_known_hosts(path):
+    """Yield (name, protocolChoice, addresses) for every line of a known_hosts file with readable host names."""
+    with open(os.path.expanduser(path), 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            words = line.split()
+            # Skip comments, @cert-authority / @revoked lines and hashed names
+            if not words or words[0].startswith(('#', '@', '|')):
+                continue
+            hosts = []
+            port = '22'
+            for host in words[0].split(','):
+                match = re.match(r'^\[(.+)\]:(\d+)$', host)
+                if match:
+                    host, port = match.groups()
+                if not any(c in host for c in '*?!'):
+                    hosts.append(host)
+            if not hosts:
+                continue
+            protocolChoice = {'protocol': 'ssh', 'host': hosts[0], 'authMeth': 'config', 'pending': ['algos', 'bitwarden']}
+            if port != '22':
+                protocolChoice['port'] = port
+            yield (hosts[0], protocolChoice, set(hosts))
+
+def hosts_from_rdp(path):
+    """Yield (name, protocolChoice, addresses) for a .rdp file, or every .rdp file below a folder."""
+    path = os.path.expanduser(path)
+    files = sorted(glob.glob(os.path.join(path, '**', '*.rdp'), recursive=True)) if os.path.isdir(path) else [path]
+    for file in files:
+        with open(file, 'rb') as f:
+            data = f.read()
+        # mstsc writes UTF-16 with a byte order mark
+        text = data.decode('utf-16') if data[:2] in [codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE] else data.decode('utf-8', 'replace')
+        settings = {}
+        for line in text.splitlines():
+            fields = line.strip().split(':', 2)
+            if len(fields) == 3:
+                settings[fields[0].lower()] = fields[2]
+        if not settings.get('full address'):
+            continue
+        try:
+            address = split_host_port(settings['full address'], 3389)[0]
+        except LauncherError as e:
+            # One broken file is reported instead of ending the whole import
+            print("Skipping '{}': {}".format(file, e))
+            continue
+        protocolChoice = {'protocol': 'rdp', 'host': settings['full address'], 'authMeth': 'pass', 'UserID': '', 'pending': ['bitwarden']}
+        if settings.get('username'):
+            protocolChoice['importedUser'] = settings['username']
+        yield (os.path.splitext(os.path.basename(file))[0], protocolChoice, {address})
+
+def hosts_import(scheme, sources):
+    """Add the hosts of ssh config, known_hosts and .rdp sources to the remote host files in one pass.
+
+    Protocol entries whose address is already in the inventory are skipped.
+    Probing SSH algorithms and mapping Bitwarden items is left to the
+    'import-enrich' background task, through the entries' "pending" list.
+    """
+    known = set()
+    for choice in dmenu_choices(scheme) if os.path.isdir(scheme.prefix) else []:
+        for protocolChoice in read_json(scheme.prefix + "/" + choice + scheme.suffix).get('protocols', []):
+            if protocolChoice['protocol'].lower() != 'web':
+                for h in remote_hosts(protocolChoice):
+                    try:
+                        known.add((protocolChoice['protocol'].lower(), split_host_port(h, 0)[0].lower()))
+                    except LauncherError as e:
+                        # A malformed inventory entry cannot match an imported host, the import goes on
+                        print("Skipping address of '{}': {}".format(choice, e))
+
+    files = {}
+    added = 0
+    for source in sources:
+        path = os.path.expanduser(source)
+        if not os.path.exists(path):
+            print("Skipping missing source '{}'".format(source))
+            continue
+        if os.path.isdir(path) or path.lower().endswith('.rdp'):
+            entries = hosts_from_rdp(path)
+        elif 'known_hosts' in os.path.basename(path):
+            entries = hosts_from_known_hosts(path)
+        else:
+            entries = hosts_from_ssh_config(path)
+
+        for name, protocolChoice, addresses in entries:
+            addresses = set((protocolChoice['protocol'], a.lower()) for a in addresses)
+            # Aliases of a known host make its other names known, too
+            overlap = addresses & known
+            known |= addresses
+            if overlap:
+                continue
+
+            filename = scheme.prefix + "/" + re.sub(r'[^\w.@-]+', '_', name) + scheme.suffix
+            if filename not in files:
+                files[filename] = read_json(filename, {'protocols': []})
+            files[filename]['protocols'].append(protocolChoice)
+            added += 1
+
+    for filename, HostJSON in files.items():
+        write_json(HostJSON, filename)
+    print("Imported {} protocol entries into {} host files".format(added, len(files)))
+    if added:
+        spawn_background(scheme, 'import-enrich')
+
+def hosts_probe_algorithms(protocolChoice):
+    """Return the ssh options isSSHcompatibleWithHost finds for an entry's real address, '' if none are needed, None if the probe failed."""
+    resolved = subprocess.run(['ssh', '-G', remote_hosts(protocolChoice)[0]], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    settings = dict(line.split(' ', 1) for line in resolved.stdout.decode('utf-8', 'replace').splitlines() if ' ' in line)
+    try:
+        return isSSHcompatibleWithHost(settings.get('hostname', remote_hosts(protocolChoice)[0]),
+                                       protocolChoice.get('port', settings.get('port', '22')))
+    except Exception:
+        # Unreachable hosts and missing xmltodict end up here alike
+        return None
+
+def hosts_match_bitwarden(protocolChoice, names):
+    """Return the id of the only Bitwarden login named after an entry's host (and user when known), or None.
+
+    Names have to be the host itself, its short name or, for a short host, a FQDN of it.
+    """
+    host = split_host_port(remote_hosts(protocolChoice)[0], 0)[0].lower()
+    if re.match(r'^[\d.]+$', host) or ':' in host:
+        hostnames = {host}
+    elif '.' in host:
+        hostnames = {host, host.split('.')[0]}
+    else:
+        hostnames = {host}
+    matches = []
+    for i in names:
+        name = i['name'].strip().lower()
+        if name in hostnames or ('.' not in host and name.split('.')[0] == host and not re.match(r'^[\d.]+$', name)):
+            matches.append(i)
+    user = protocolChoice.get('importedUser', '').split('\\')[-1].lower()
+    if user:
+        matches = [i for i in matches if i['username'].split('\\')[-1].lower() == user] or matches
+    return matches[0]['id'] if len(matches) == 1 else None
+
+def hosts_enrich(scheme):
+    """Work off the "pending" list of imported protocol entries concurrently: SSH algorithm probes and Bitwarden mapping."""
+    pending = []
+    for choice in dmenu_choices(scheme):
+        path = scheme.prefix + "/" + choice + scheme.suffix
+        for n, protocolChoice in enumerate(read_json(path).get('protocols', [])):
+            if protocolChoice.get('pending'):
+                pending.append((path, n, protocolChoice))
+    if not pending:
+        return
+
+    sessionID = bw_cached_session()
+    names = pass_index(scheme, sessionID) if sessionID is not None else read_json(CacheDir + '/bw-names.json', [])
+    nmap = find_util('nmap') is not None
+
+    def enrich(protocolChoice):
+        done = {}
+        if not remote_hosts(protocolChoice):
+            return done
+        if 'algos' in protocolChoice['pending'] and nmap:
+            done['algos'] = hosts_probe_algorithms(protocolChoice)
+        if 'bitwarden' in protocolChoice['pending'] and names:
+            done['bitwarden'] = hosts_match_bitwarden(protocolChoice, names)
+        return done
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ProbeWorkers) as executor:
+        results = list(executor.map(enrich, [protocolChoice for path, n, protocolChoice in pending]))
+
+    # Re-read every file, so changes made while probing are kept
+    updates = {}
+    for (path, n, protocolChoice), done in zip(pending, results):
+        updates.setdefault(path, []).append((n, protocolChoice, done))
+    for path, entries in updates.items():
+        HostJSON = read_json(path)
+        for n, protocolChoice, done in entries:
+            if n >= len(HostJSON.get('protocols', [])) or HostJSON['protocols'][n].get('host') != protocolChoice['host']:
+                continue
+            entry = HostJSON['protocols'][n]
+            if done.get('algos') is not None:
+                if done['algos'].strip():
+                    entry['option'] = done['algos'].strip()
+                entry['pending'].remove('algos')
+            if 'bitwarden' in done:
+                if done['bitwarden'] is not None:
+                    entry['UserID'] = done['bitwarden']
+                    if entry['protocol'] == 'ssh':
+                        entry['authMeth'] = 'pass'
+                entry['pending'].remove('bitwarden')
+                entry.pop('importedUser', None)
+            if not entry['pending']:
+                del entry['pending']
+        write_json(HostJSON, path)
+
+def remote_tags(HostJSON, choiceArrayNumber):
+    """Return the tags of a protocol entry: its own, its host's and the protocol type."""
+    protocolChoice = HostJSON['protocols'][choiceArrayNumber]
+    tags = HostJSON.get('tags', []) + protocolChoice.get('tags', []) + [protocolChoice['protocol']]
+    return set(tag.lower().lstrip('#') for tag in tags)
+
+def remote_tag_index(scheme):
+    """Return the inverted tag index {tag: [[choice, choiceArrayNumber], ...]} of the remote inventory.
+
+    The index is cached next to the host files' mtimes, only changed host files are parsed again.
+    """
+    path = CacheDir + '/remote-tags.json'
+    cache = read_json(path, {'files': {}, 'tags': {}})
+
+    files = {}
+    changed = False
+    for choice in dmenu_choices(scheme):
+        mtime = os.stat(scheme.prefix + "/" + choice + scheme.suffix).st_mtime
+        if choice in cache['files'] and cache['files'][choice]['mtime'] == mtime:
+            files[choice] = cache['files'][choice]
+            continue
+
+        HostJSON = read_json(scheme.prefix + "/" + choice + scheme.suffix)
+        files[choice] = {'mtime': mtime, 'tags': [sorted(remote_tags(HostJSON, n)) for n in range(len(HostJSON.get('protocols', [])))]}
+        changed = True
+
+    if not changed and files.keys() == cache['files'].keys():
+        return cache['tags']
+
+    tags = {}
+    for choice, entry in files.items():
+        for choiceArrayNumber, protocolTags in enumerate(entry['tags']):
+            for tag in protocolTags:
+                tags.setdefault(tag, []).append([choice, choiceArrayNumber])
+
+    write_json({'files': files, 'tags': tags}, path)
+    return tags
+
+def remote_tag_query(scheme, query):
+    """Connect to one or all protocol entries matching every '#tag' of the query."""
+    tags = remote_tag_index(scheme)
+    matches = None
+    for tag in query.lower().split():
+        entries = set(tuple(entry) for entry in tags.get(tag.lstrip('#'), []))
+        matches = entries if matches is None else matches & entries
+    if not matches:
+        return
+
+    entries = {}
+    for choice, choiceArrayNumber in sorted(matches):
+        HostJSON = read_json(scheme.prefix + "/" + choice + scheme.suffix)
+        protocolChoice = HostJSON['protocols'][choiceArrayNumber]
+        entries[choice + ' (' + protocolChoice.get('name', protocolChoice['protocol']) + ')'] = (scheme.prefix + "/" + choice + scheme.suffix, HostJSON, choiceArrayNumber)
+
+    groupChoice = 'All ' + str(len(entries)) + ' hosts'
+    tmp = dmenu_call(scheme, query, [groupChoice] + list(entries.keys()))
+    if tmp == groupChoice:
+        remote_connect_selections(scheme, list(entries.values()))
+    elif tmp in entries:
+        remote_connect_selections(scheme, [entries[tmp]])
+
+def split_host_port(host, port):
+    """Split 'host:port' into (host, port), keeping the given default port when none is set."""
+    address = host
+    if host.count(':') == 1:
+        host, port = host.split(':')
+    try:
+        return (host, int(port))
+    except ValueError:
+        raise LauncherError("Invalid port in '{}'!".format(address))
+
+def tcp_rtt(host, port, timeout=1.0):
+    """Return the TCP connect time to host:port in ms, or None if it is unreachable."""
+    start = time.monotonic()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            pass
+    except OSError:
+        return None
+    return (time.monotonic() - start) * 1000
+
+def rdp_profile(protocolChoice):
+    """Return the RDPProfiles key to use for a rdp protocol entry."""
+    profile = protocolChoice.get('profile', RDPDefaultProfile)
+    if not isinstance(profile, str):
+        raise LauncherError("RDP profiles are names of RDPProfiles or auto, not {}!".format(json.dumps(profile)))
+    profile = profile.lower()
+
+    if profile == 'auto':
+        # RDP files carry their own address, measure only plain hosts
+        if "RDPfile" in protocolChoice:
+            profile = RDPUnreachableProfile
+        else:
+            profile = rtt_profile(*split_host_port(protocolChoice['host'], 3389), RDPAutoProfile, RDPUnreachableProfile)
+
+    if profile not in RDPProfiles:
+        raise LauncherError("Unknown RDP profile '{}', use auto or one of {}!".format(profile, ', '.join(RDPProfiles)))
+    return profile
+
+def rtt_profile(host, port, limits, unreachable):
+    """Return the first profile of limits [(ms, profile)] above the RTT to host:port, the last one if slower, unreachable if there is no RTT."""
+    rtt = tcp_rtt(host, port)
+    if rtt is None or not limits:
+        return unreachable
+    for limit, profile in limits:
+        if rtt < limit:
+            return profile
+    return limits[-1][1]
+
+def vnc_port(host):
+    """Return (host, port) for a VNC address in host, host:display or host::port form."""
+    try:
+        if '::' in host:
+            address, port = host.split('::')
+            return (address, int(port))
+        if host.count(':') == 1:
+            address, display = host.split(':')
+            return (address, 5900 + int(display))
+    except ValueError:
+        raise LauncherError("Invalid VNC display or port in '{}'!".format(host))
+    return (host, 5900)
+
+def vnc_profile(protocolChoice):
+    """Return the VNCProfiles settings for a vnc protocol entry, with per-host overrides applied.
+
+    "profile" in the host JSON is either a VNCProfiles key / 'auto', or an object
+    with a "base" profile and any of its settings overridden.
+    """
+    profile = protocolChoice.get('profile', VNCDefaultProfile)
+    overrides = {}
+    if isinstance(profile, dict):
+        overrides = profile
+        profile = profile.get('base', VNCDefaultProfile)
+    if not isinstance(profile, str):
+        raise LauncherError("VNC profiles are names of VNCProfiles or auto, not {}!".format(json.dumps(profile)))
+    profile = profile.lower()
+
+    if profile == 'auto':
+        profile = rtt_profile(*vnc_port(protocolChoice['host']), VNCAutoProfile, VNCUnreachableProfile)
+    if profile not in VNCProfiles:
+        raise LauncherError("Unknown VNC profile '{}', use auto or one of {}!".format(profile, ', '.join(VNCProfiles)))
+
+    settings = dict(VNCProfiles[profile])
+    for key in settings:
+        if key in overrides:
+            settings[key] = overrides[key]
+    return settings
+
+def vnc_profile_options(protocolChoice):
+    """Return the ssvncviewer options for a vnc protocol entry's profile."""
+    settings = vnc_profile(protocolChoice)
+
+    options = ''
+    if settings['encodings']:
+        options = options + '-encodings "' + settings['encodings'] + '" '
+    if settings['compresslevel'] != '':
+        options = options + '-compresslevel ' + str(settings['compresslevel']) + ' '
+    if settings['quality'] != '':
+        options = options + '-quality ' + str(settings['quality']) + ' '
+    if settings['depth']:
+        options = options + '-' + settings['depth'] + ' '
+    if settings['scale']:
+        options = options + '-scale ' + str(settings['scale']) + ' '
+    return options
+
+def remote_endpoints(HostJSON):
+    """Return the (host, port) pairs a remote host JSON connects to, every address of a "host" list included."""
+    endpoints = []
+    for protocolChoice in HostJSON.get('protocols', []):
+        protocol = protocolChoice['protocol'].lower()
+        if protocol == 'web':
+            url = urllib.parse.urlsplit(protocolChoice['url'])
+            if url.hostname:
+                endpoints.append((url.hostname, url.port or (80 if url.scheme == 'http' else 443)))
+            continue
+        for host in remote_hosts(protocolChoice):
+            if protocol == 'ssh':
+                endpoints.append(split_host_port(host, protocolChoice.get('port', 22)))
+            elif protocol == 'rdp':
+                endpoints.append(split_host_port(host, 3389))
+            elif protocol == 'vnc':
+                endpoints.append(vnc_port(host))
+    return endpoints
+
+def probe_remote_hosts(scheme):
+    """TCP-probe every endpoint in the remote inventory and cache the best RTT per host file."""
+    status = CacheDir + '/reachability.json'
+    # Mark the cache as fresh first, so menus opened meanwhile do not start another probe
+    write_json(read_json(status, {'time': 0, 'hosts': {}}) | {'time': time.time()}, status)
+
+    hosts = {}
+    for choice in dmenu_choices(scheme):
+        # A malformed address leaves its host unprobed instead of ending the probe
+        try:
+            hosts[choice] = remote_endpoints(read_json(scheme.prefix + "/" + choice + scheme.suffix))
+        except LauncherError:
+            hosts[choice] = []
+
+    endpoints = set(e for choiceEndpoints in hosts.values() for e in choiceEndpoints)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ProbeWorkers) as executor:
+        rtts = dict(zip(endpoints, executor.map(lambda e: tcp_rtt(*e), endpoints)))
+
+    result = {'time': time.time(), 'hosts': {}}
+    for choice, choiceEndpoints in hosts.items():
+        if choiceEndpoints:
+            reachable = [rtts[e] for e in choiceEndpoints if rtts[e] is not None]
+            result['hosts'][choice] = min(reachable) if reachable else None
+    write_json(result, status)
+
+def remote_status_labels(scheme, choices):
+    """Return remote menu lines annotated with cached reachability, refreshing stale results in the background."""
+    status = read_json(CacheDir + '/reachability.json', {'time': 0, 'hosts': {}})
+    age = time.time() - status['time']
+    if age > ProbeTTL / 2:
+        spawn_background(scheme, 'probe')
+    if age > ProbeTTL or not choices:
+        return {}
+
+    width = max(len(c) for c in choices)
+    labels = {}
+    for choice in choices:
+        if choice not in status['hosts']:
+            continue
+        if status['hosts'][choice] is None:
+            labels[choice] = choice.ljust(width) + '  [down]'
+        else:
+            labels[choice] = choice.ljust(width) + '  [up {:.0f} ms]'.format(status['hosts'][choice])
+    return labels
+
+def spawn_background(scheme, task, data=None):
+    """Run the launcher with --<target> --background task, detached so the launcher can exit right away.
+
+    data is passed on the task's stdin, keeping it out of the process list.
+    """
+    package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([package] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    background = subprocess.Popen([sys.executable, '-m', 'dmenu_launch', '--' + scheme.target, '--background', task],
+                                  env=env,
+                                  stdin=subprocess.PIPE if data is not None else subprocess.DEVNULL,
+                                  stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL,
+                                  start_new_session=True)
+    if data is not None:
+        background.stdin.write(data)
+        background.stdin.close()
+
+def run_background(scheme, task):
+    """Entry point of tasks started with spawn_background."""
+    if task == 'probe':
+        probe_remote_hosts(scheme)
+    if task == 'prefetch':
+        credential_daemon(scheme)
+    if task == 'pass-index':
+        sessionID = bw_cached_session()
+        if sessionID is not None:
+            pass_index(scheme, sessionID)
+    if task == 'search-index':
+        search_index_build(scheme)
+    if task == 'history':
+        history_sync()
+    if task == 'latency':
+        latency_watch(json.loads(sys.stdin.read()))
+    if task == 'import-enrich':
+        hosts_enrich(scheme)
+    if task == 'clear-clipboard':
+        clipboard_clear(sys.stdin.read().strip(), ClipboardClearTime)
+
+def run_subprocess(cmd):
+    #print(cmd)
+    return subprocess.Popen(cmd, stdin =subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          stdout=subprocess.PIPE,
+                          shell=True,)
+
+def bw_list_items(sessionID):
+    """Yield the items of 'bw list items' one by one while the CLI output is streamed.
+
+    Only one decoded item is alive at a time, instead of the whole vault's object graph.
+    """
+    command = subprocess.Popen(['bw', 'list', 'items', '--session', sessionID],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    eof = False
+    try:
+        while True:
+            # Skip the array syntax between items
+            pos = 0
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+                started = started or buffer[pos] == '['
+                pos += 1
+            buffer = buffer[pos:]
+
+            if started and buffer:
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except ValueError:
+                    if eof:
+                        break
+                else:
+                    buffer = buffer[end:]
+                    yield item
+                    continue
+            elif eof:
+                break
+
+            chunk = command.stdout.read(65536)
+            eof = chunk == b''
+            buffer += utf8.decode(chunk, final=eof)
+    finally:
+        command.stdout.close()
+        command.wait()
+
+def bw_list(scheme):
+    
+    sessionID = bw_get_session(scheme)
+    
+    JsonReturn = {}
+    tempArr = []
+
+    for i in bw_list_items(sessionID):
+        if 'login' in i:
+            tmpJSON = {}
+            tmpJSON['id'] = i['id']
+            tmpJSON['name'] = i['name']
+            tmpJSON['username'] = i['login']['username']
+            if 'attachments' in i:
+                tmpJSON['attachments'] = []
+                for a in i['attachments']:
+                    tmpJSON['attachments'].append(a['fileName'])
+            
+            tempArr.append(tmpJSON)
+
+    JsonReturn['Users'] = tempArr
+    #print(JsonReturn['Users'])
+    return(JsonReturn['Users'])
+
+def bw_get_login(scheme,id,sessionID=None,use_daemon=True):
+    
+    if use_daemon:
+        JsonReturn = credential_daemon_get(id)
+        if JsonReturn is not None:
+            return(JsonReturn)
+
+    if sessionID is None:
+        sessionID = bw_get_session(scheme)
+    
+    result = subprocess.run(['bw', 'get', 'item', id, '--session', sessionID], stdout=subprocess.PIPE)
+    BWJSON = json.loads(result.stdout)
+    
+    JsonReturn = BWJSON['login']
+
+    if 'fields' in BWJSON:
+        for costum in BWJSON['fields']:
+            JsonReturn[costum['name']] = costum['value']
+
+
+    del result
+    del BWJSON
+    #print(JsonReturn)
+    return(JsonReturn)
+
+def bw_get_logins(scheme,ids,sessionID=None,use_daemon=True):
+    """Return {id: login} like bw_get_login for several items, with a single bw call."""
+    JsonReturn = {}
+    for id in ids if use_daemon else []:
+        login = credential_daemon_get(id)
+        if login is not None:
+            JsonReturn[id] = login
+    ids = set(ids) - set(JsonReturn)
+
+    if len(ids) == 0:
+        return JsonReturn
+    if len(ids) == 1:
+        id = list(ids)[0]
+        JsonReturn[id] = bw_get_login(scheme,id,sessionID,use_daemon)
+        return JsonReturn
+
+    if sessionID is None:
+        sessionID = bw_get_session(scheme)
+
+    for i in bw_list_items(sessionID):
+        if i['id'] in ids and 'login' in i:
+            JsonReturn[i['id']] = i['login']
+            if 'fields' in i:
+                for costum in i['fields']:
+                    JsonReturn[i['id']][costum['name']] = costum['value']
+
+    return(JsonReturn)
+
+def bw_get_attachment(scheme,id,filename,sessionID=None):
+    
+    if sessionID is None:
+        sessionID = bw_get_session(scheme)
+    
+    #print('bw get attachment ' + filename + ' --raw --itemid ' + id + '--session ' + sessionID)
+    
+    #result = subprocess.run(['bw', 'get', 'attachment', filename, '--raw', '--itemid', id, '--session', sessionID], stdout=subprocess.PIPE)
+    #print(result)
+    
+    command = subprocess.Popen(['bw', 'get', 'attachment', filename, '--raw', '--itemid', id, '--session', sessionID],
+                             stdin=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             stdout=subprocess.PIPE)
+
+    stdout_data, errors = command.communicate()
+    #print(stdout_data'.decode('utf-8')')
+
+    Path = create_tmp_file_mkstemp(stdout_data.decode('utf-8'))
+    del stdout_data
+    return(Path)
+
+def ssh_agent_available():
+    """Return True if ssh-agent is enabled and reachable through SSH_AUTH_SOCK."""
+    if SSHAgentKeyLifetime <= 0 or 'SSH_AUTH_SOCK' not in os.environ:
+        return False
+    if find_util('ssh-add') is None or find_util('ssh-keygen') is None:
+        return False
+
+    # ssh-add -l returns 1 when the agent runs but holds no keys, 2 when unreachable
+    result = subprocess.run(['ssh-add', '-l'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return result.returncode in [0, 1]
+
+def ssh_agent_get_key(protocolChoice):
+    """Return the ssh-agent state of the protocol's Bitwarden key if it is still loaded, else None."""
+    if not ssh_agent_available():
+        return None
+
+    state = read_json(CacheDir + '/ssh-agent.json')
+    key = protocolChoice['UserID'] + '/' + protocolChoice['keyFile']
+    if key not in state:
+        return None
+    # The agent drops the key at 'expires', one about to go is loaded again
+    if state[key].get('expires', 0) < time.time() + 10:
+        return None
+
+    result = subprocess.run(['ssh-add', '-l', '-E', 'sha256'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    loaded = result.stdout.decode('utf-8').split()
+    if state[key]['fingerprint'] in loaded and os.path.isfile(state[key]['pubkey']):
+        return state[key]
+
+    return None
+
+def ssh_agent_add_key(protocolChoice, keyFile, username):
+    """Load a private key file into ssh-agent for SSHAgentKeyLifetime seconds and remember it by fingerprint."""
+    if not ssh_agent_available():
+        return None
+
+    result = subprocess.run(['ssh-add', '-t', str(SSHAgentKeyLifetime), keyFile],
+                            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        return None
+
+    result = subprocess.run(['ssh-keygen', '-l', '-E', 'sha256', '-f', keyFile], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    fingerprint = result.stdout.decode('utf-8').split()[1]
+
+    # ssh only needs the public half to pick the agent key with -i / IdentitiesOnly
+    result = subprocess.run(['ssh-keygen', '-y', '-f', keyFile], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    pubkey = CacheDir + '/ssh-keys/' + fingerprint.replace('/', '_').replace(':', '_') + '.pub'
+    if(not os.path.isdir(os.path.dirname(pubkey))):
+        os.makedirs(os.path.dirname(pubkey))
+    with open(pubkey, 'w') as f:
+        f.write(result.stdout.decode('utf-8'))
+
+    state = read_json(CacheDir + '/ssh-agent.json')
+    key = protocolChoice['UserID'] + '/' + protocolChoice['keyFile']
+    state[key] = {
+        'fingerprint': fingerprint,
+        'pubkey': pubkey,
+        'username': username,
+        'expires': int(time.time()) + SSHAgentKeyLifetime,
+    }
+    write_json(state, CacheDir + '/ssh-agent.json')
+    return state[key]
+
+def ssh_control_options(protocolChoice):
+    """Return ssh ControlMaster options for hosts used at least SSHControlThreshold times, else ''."""
+    if SSHControlThreshold <= 0 or protocolChoice.get('ConnectionTimes', 0) < SSHControlThreshold:
+        return ''
+
+    if(not os.path.isdir(SSHControlDir)):
+        os.makedirs(SSHControlDir, mode=0o700)
+
+    # %C hashes local host, remote host, port and user so every master gets a short unique socket
+    return '-o ControlMaster=auto -o ControlPath=' + SSHControlDir + '/%C -o ControlPersist=' + SSHControlPersist + ' '
+
+def ssh_prewarm_masters(scheme):
+    """Open ControlMaster connections in the background for frequent SSH hosts whose key is in ssh-agent."""
+    if SSHControlThreshold <= 0 or not ssh_agent_available():
+        return
+
+    for basedir, dirs , files in os.walk(scheme.prefix, followlinks=True):
+        for f in files:
+            if not f.endswith(scheme.suffix):
+                continue
+            HostJSON = read_json(os.path.join(basedir, f))
+            for protocolChoice in HostJSON.get('protocols', []):
+                if (protocolChoice['protocol'].lower() != 'ssh' or protocolChoice.get('authMeth', '').lower() != 'key'):
+                    continue
+                options = ssh_control_options(protocolChoice)
+                if options == '':
+                    continue
+                AgentKey = ssh_agent_get_key(protocolChoice)
+                if AgentKey is None or not remote_hosts(protocolChoice):
+                    continue
+
+                cmd = ['ssh'] + shlex.split(options)
+                if "port" in protocolChoice:
+                    cmd = cmd + ['-p', str(protocolChoice['port'])]
+                target = AgentKey['username'] + '@' + remote_hosts(protocolChoice)[0]
+
+                check = subprocess.run(cmd + ['-O', 'check', target], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                if check.returncode == 0:
+                    continue
+
+                if "option" in protocolChoice:
+                    cmd = cmd + shlex.split(protocolChoice['option'])
+                cmd = cmd + ['-f', '-N', '-o', 'BatchMode=yes', '-o', 'StrictHostKeyChecking=no',
+                             '-o', 'IdentitiesOnly=yes', '-i', AgentKey['pubkey'], target]
+                subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                      stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL,
+                                      start_new_session=True)
+
+def credential_daemon_get(id):
+    """Return a login prefetched by the credential daemon, or None if it is not running or does not hold it."""
+    if CredentialPrefetch <= 0 or not os.path.exists(CredentialSocket):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(1)
+            client.connect(CredentialSocket)
+            client.sendall(id.encode('utf-8') + b'\n')
+            data = b''
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+    except OSError:
+        return None
+    if data == b'':
+        return None
+    return json.loads(data)
+
+def credential_daemon_start(scheme):
+    """Start the credential daemon when the vault is unlocked and it is not running yet."""
+    if CredentialPrefetch <= 0 or bw_cached_session() is None:
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(CredentialSocket)
+            client.sendall(b'\n')
+        return
+    except OSError:
+        spawn_background(scheme, 'prefetch')
+
+def credential_daemon_rank(scheme):
+    """Return the Bitwarden ids of the CredentialPrefetch most used protocol entries, recent use weighing more."""
+    scores = {}
+    now = datetime.now()
+    for choice in dmenu_choices(scheme):
+        HostJSON = read_json(scheme.prefix + "/" + choice + scheme.suffix)
+        for protocolChoice in HostJSON.get('protocols', []):
+            if not protocolChoice.get("UserID") or "LastConnection" not in protocolChoice:
+                continue
+            days = (now - datetime.strptime(protocolChoice['LastConnection'], '%Y-%m-%d %H:%M:%S')).days
+            score = protocolChoice.get('ConnectionTimes', 1) / (1 + max(days, 0))
+            scores[protocolChoice['UserID']] = scores.get(protocolChoice['UserID'], 0) + score
+    return sorted(scores, key=scores.get, reverse=True)[:CredentialPrefetch]
+
+def credential_daemon(scheme):
+    """Keep the logins of the most used hosts in (locked) memory and serve them on CredentialSocket until the Bitwarden session ends."""
+    sessionID = bw_cached_session()
+    if CredentialPrefetch <= 0 or sessionID is None:
+        return
+
+    # Keep the secrets out of swap and core dumps where the system allows it
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mlockall(3)        # MCL_CURRENT | MCL_FUTURE
+        libc.prctl(4, 0)        # PR_SET_DUMPABLE 0
+    except (OSError, AttributeError):
+        pass
+
+    if(not os.path.isdir(CacheDir)):
+        os.makedirs(CacheDir)
+    os.chmod(CacheDir, 0o700)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        if os.path.exists(CredentialSocket):
+            # Another daemon already serves the socket, otherwise it is a leftover
+            try:
+                server.connect(CredentialSocket)
+                server.close()
+                return
+            except OSError:
+                os.remove(CredentialSocket)
+        server.bind(CredentialSocket)
+    except OSError:
+        return
+    os.chmod(CredentialSocket, 0o600)
+    server.listen(8)
+    server.settimeout(5)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Asking the own socket, which accepts nothing yet, would wait out its timeout per id
+    logins = bw_get_logins(scheme, credential_daemon_rank(scheme), sessionID, use_daemon=False)
+    checked = time.monotonic()
+    try:
+        while bw_cached_session() == sessionID:
+            # Re-check the vault lock state every few minutes, bw lock does not remove the session file
+            if time.monotonic() - checked > 300:
+                if not bw_check_session():
+                    break
+                checked = time.monotonic()
+
+            try:
+                client, address = server.accept()
+            except socket.timeout:
+                continue
+            with client:
+                client.settimeout(1)
+                try:
+                    creds = client.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+                    if struct.unpack('3i', creds)[1] != os.getuid():
+                        continue
+                    id = client.makefile('rb').readline().decode('utf-8').strip()
+                    if id in logins:
+                        client.sendall(json.dumps(logins[id]).encode('utf-8'))
+                except OSError:
+                    continue
+    finally:
+        logins.clear()
+        server.close()
+        if os.path.exists(CredentialSocket):
+            os.remove(CredentialSocket)
+
+def bw_cached_session():
+    """Return the cached Bitwarden session without asking to unlock, or None."""
+    for file in glob.glob('/tmp/kiZIN*'):
+        with open(file, 'r') as f:
+            return f.read()
+    return None
+
+def bw_check_session():
+    """Forget the cached Bitwarden session if the vault got locked meanwhile, return True if it is usable."""
+    for file in glob.glob('/tmp/kiZIN*'):
+        with open(file, 'r') as f:
+            sessionID = f.read()
+        result = subprocess.run(['bw', 'unlock', '--check', '--session', sessionID],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode == 0:
+            return True
+        os.remove(file)
+    return False
+
+def bw_get_session(scheme):
+    
+    # Let a running speculative session check finish first, it may drop a stale session file
+    speculation_result('session')
+
+    txtfiles = []
+    tmpfile = ''
+    sessionID = ''
+    for file in glob.glob('/tmp/kiZIN*'):
+        txtfiles.append(file)
+        tmpfile = file
+        #print(file)
+
+
+    #if (tmpfile != ''): # ONLY for TESTING GET SESSION
+    #    os.remove(tmpfile)
+    #    tmpfile = ''
+
+    if (tmpfile == ''): 
+        #print('no tmp file get session')
+
+        dmenu = subprocess.Popen(['bw', 'unlock', '--raw'],
+                             stdin=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             stdout=subprocess.PIPE)
+
+        sessionID, errors = dmenu.communicate(dmenu_call(scheme, "Unlock Pass", None, True, True).encode('utf-8'))
+
+        #print(sessionID)
+        if (sessionID == b''):
+            raise LauncherError("Could not unlock the Bitwarden vault!")
+        
+        create_tmp_file(sessionID,'kiZIN')
+
+        dmenu = subprocess.Popen(['bw', 'sync', '--session', sessionID],
+                             stdin=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             stdout=subprocess.PIPE)
+
+        stdout_data, errors = dmenu.communicate()
+        #print(stdout_data)
+
+    else:
+        #print('Session found, open session')
+        f = open(tmpfile, "r")
+        sessionID = f.read()
+    
+    return sessionID
+
+def create_tmp_file_mkstemp(message):
+    fp = tempfile.mkstemp()
+    #print('Handle:', fp[0])
+    #print('FilePath:', fp[1])
+    #print(message)
+    try:
+        with os.fdopen(fp[0], 'w+') as tmp:
+            tmp.write(message)
+            tmp.seek(0)
+            tmp.close()
+            # read temp file
+            #s = tmp.read()
+            #print(s)
+    finally:
+        return fp[1]
+
+def create_tmp_file(str,prefix=None,suffix=None,delete=False):
+    with tempfile.NamedTemporaryFile(prefix=prefix,suffix=suffix,delete=delete) as t:
+        t.write(str)
+        path = t.name
+        t.close()
+        #print(path)
+        return path
+    
+def read_json(filename, default=None):
+    """Return the parsed content of a JSON file, or default ({}) if it does not exist or is unreadable."""
+    if default is None:
+        default = {}
+    if not os.path.isfile(filename):
+        return default
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json(data, filename): 
+    filenameArr = filename.split('/')
+    filename = filenameArr[len(filenameArr) - 1]
+    filenameArr.pop(len(filenameArr) - 1)
+    path = '/'.join(filenameArr)
+
+    if(not os.path.isdir(path)):
+        os.makedirs(path)
+
+    with open(path + '/' + filename,'w') as f: 
+        json.dump(data, f, indent=4) 
+
+def isSSHcompatibleWithHost(host,port='22'):
+    import socket
+    import re
+    import xmltodict
+    import platform
+
+    NmapResult = subprocess.run(['nmap','--script','ssh2-enum-algos','-sV','-p',port,'-oX','-',host], stdout=subprocess.PIPE)
+
+    NmapArray = str(NmapResult).split("\\n")
+    del NmapArray[0:4]
+    NmapArray.pop()
+    NmapXMLstr = ''.join(NmapArray)
+
+    NMAPJSON = json.loads(json.dumps(xmltodict.parse(NmapXMLstr), indent=4, sort_keys=True))
+    #print(NMAPJSON['nmaprun']['host']['ports']['port']['script']['table'])    ## Help digging
+
+    encryption_algorithms = NMAPJSON['nmaprun']['host']['ports']['port']['script']['table'][2]['elem']
+    kex_algorithms = NMAPJSON['nmaprun']['host']['ports']['port']['script']['table'][0]['elem']
+    mac_algorithms = NMAPJSON['nmaprun']['host']['ports']['port']['script']['table'][3]['elem']
+
+
+    #ssh -G localhost | grep "ciphers\|kexalgorithms\|macs"
+    LocalCiphers = ["chacha20-poly1305@openssh.com","aes128-ctr","aes192-ctr","aes256-ctr","aes128-gcm@openssh.com","aes256-gcm@openssh.com"]
+    LocalKex = [ "curve25519-sha256","curve25519-sha256@libssh.org","ecdh-sha2-nistp256","ecdh-sha2-nistp384","ecdh-sha2-nistp521","diffie-hellman-group-exchange-sha256","diffie-hellman-group16-sha512","diffie-hellman-group18-sha512","diffie-hellman-group14-sha256" ]
+    LocalMacs = [ "umac-64-etm@openssh.com","umac-128-etm@openssh.com","hmac-sha2-256-etm@openssh.com","hmac-sha2-512-etm@openssh.com","hmac-sha1-etm@openssh.com","umac-64@openssh.com","umac-128@openssh.com","hmac-sha2-256","hmac-sha2-512","hmac-sha1" ]
+
+    if(isinstance(kex_algorithms, str)):
+        kex_algorithms = kex_algorithms.split()
+
+    #print(encryption_algorithms)
+    #print(kex_algorithms)
+    #print(LocalKex)
+    #print(mac_algorithms)
+
+    MatchChiper = 0
+    for myChiper in LocalCiphers:
+        for thereChiper in encryption_algorithms:
+            if myChiper == thereChiper:
+                MatchChiper = MatchChiper + 1
+                #print('myChiper ' + myChiper + ' = thereChiper ' + thereChiper)
+    #print(MatchChiper)
+
+    MatchKex = 0
+    for myKex in LocalKex:
+        for thereKex in kex_algorithms:
+            if myKex == thereKex:
+                MatchKex = MatchKex + 1
+                #print('myKex ' + myKex + ' = thereKex ' + thereKex)
+    #print(MatchKex)
+
+    MatchMacs = 0
+    for myMacs in LocalMacs:
+        for thereMacs in mac_algorithms:
+            if myMacs == thereMacs:
+                MatchMacs = MatchMacs + 1
+                #print('myMacs ' + myMacs + ' = thereMacs ' + thereMacs)
+    #print(MatchMacs)
+
+
+    #echo cipher cipher-auth mac kex key | xargs -n1 SSH -Q
+    options = ''
+
+    if(MatchChiper == 0):
+        ChiperResult = subprocess.run(['ssh','-Q','cipher'], stdout=subprocess.PIPE)
+        ChiperArray = str(ChiperResult).split('\\n')
+        #print(ChiperArray)
+        ChiperArray[0] = ChiperArray[0][70:]
+        ChiperArray.pop()
+        #print(ChiperArray)
+        ChiperUni = list((set(ChiperArray) | set(LocalCiphers)) - (set(ChiperArray) & set(LocalCiphers)))
+        #print(ChiperUni)
+        for myChiper in ChiperUni:
+            for thereChiper in encryption_algorithms:
+                if myChiper == thereChiper:
+                    options = options + '-c ' + myChiper  + ' '
+                
+
+    if(MatchKex == 0):
+        KexResult = subprocess.run(['ssh','-Q','kex'], stdout=subprocess.PIPE)
+        KexArray = str(KexResult).split('\\n')
+        #print(KexArray)
+        KexArray[0] = KexArray[0][67:]
+        KexArray.pop()
+        #print(KexArray)
+        KexUni = list((set(KexArray) | set(LocalKex)) - (set(KexArray) & set(LocalKex)))
+        #print(KexUni)
+        for myKex in KexUni:
+            for thereKex in kex_algorithms:
+                if myKex == thereKex:
+                    options = options + '-o KexAlgorithms=+' + myKex + ' '
+        
+
+    if(MatchMacs == 0):
+        MacsResult = subprocess.run(['ssh','-Q','mac'], stdout=subprocess.PIPE)
+        MacsArray = str(MacsResult).split('\\n')
+        #print(MacsArray)
+        MacsArray[0] = MacsArray[0][67:]
+        MacsArray.pop()
+        #print(MacsArray)
+        MacsUni = list((set(MacsArray) | set(LocalMacs)) - (set(MacsArray) & set(LocalMacs)))
+        #print(MacsUni)
+        for myMacs in MacsUni:
+            for thereMacs in mac_algorithms:
+                if myMacs == thereKex:
+                    print(myMacs) 
+
+    return options
+
+
+
+# ------------------------------------------------------------------------------
+# EOF
+# ------------------------------------------------------------------------------
\ No newline at end of file